@@ -0,0 +1,192 @@
+import os
+import logging
+import threading
+import geopandas as gpd
+from django.conf import settings
+from .code_index import CodeIndex
+
+logger = logging.getLogger(__name__)
+
+
+# Every cached layer is served in the CRS the web maps draw in
+WEB_CRS = "EPSG:4326"
+
+# A shapefile is only unchanged if none of its parts changed. The .shx is left out:
+# it is derived from the .shp, and with SHAPE_RESTORE_SHX (set by mapplot) GDAL
+# rewrites it on every open.
+SHAPEFILE_PARTS = ('.shp', '.dbf', '.prj', '.cpg')
+
+
+def layer_signature(path):
+    """(file, mtime_ns, size) of the layer file and, for a .shp, its sidecar files."""
+    root, extension = os.path.splitext(path)
+    files = [root + part for part in SHAPEFILE_PARTS] if extension.lower() == '.shp' else [path]
+    signature = []
+    for name in files:
+        try:
+            stat = os.stat(name)
+        except FileNotFoundError:
+            if name == path:
+                raise
+            continue
+        signature.append((name, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+# Media folders whose shapefiles convert_boundary_layers converts by default
+CONVERTED_LAYER_DIRS = getattr(settings, 'BOUNDARY_LAYER_DIRS', ('basic_shape', 'Drain_shp', 'rwm_data', 'shapefile'))
+
+
+# The packed R-tree reorders features on disk; this column restores the source order
+SOURCE_ROW_COLUMN = '_source_row'
+
+
+def converted_path(path):
+    """The FlatGeobuf copy convert_layer writes next to a shapefile."""
+    return os.path.splitext(path)[0] + '.fgb'
+
+
+def layer_source(path, crs=WEB_CRS):
+    """
+    (file to read, signature) for a layer in crs: the FlatGeobuf copy (always in
+    WEB_CRS) when it exists and is at least as new as every part of the source,
+    else the source itself.
+    """
+    signature = layer_signature(path)
+    converted = converted_path(path)
+    if converted != path and crs == WEB_CRS:
+        try:
+            stat = os.stat(converted)
+        except FileNotFoundError:
+            return path, signature
+        if stat.st_mtime_ns >= max(mtime for _, mtime, _ in signature):
+            return converted, signature + ((converted, stat.st_mtime_ns, stat.st_size),)
+    return path, signature
+
+
+def convert_layer(path, crs=WEB_CRS):
+    """
+    Writes the layer at path as FlatGeobuf (packed Hilbert R-tree spatial index)
+    next to it, reprojected to crs. The file is renamed into place, so readers
+    never see a partial copy. Returns the converted path.
+    """
+    frame = gpd.read_file(path)
+    if crs is not None and frame.crs is not None and frame.crs != crs:
+        frame = frame.to_crs(crs)
+    frame[SOURCE_ROW_COLUMN] = range(len(frame))
+    converted = converted_path(path)
+    staging = f"{os.path.splitext(converted)[0]}.{os.getpid()}.tmp.fgb"
+    try:
+        frame.to_file(staging, driver='FlatGeobuf', SPATIAL_INDEX='YES')
+        os.replace(staging, converted)
+    except BaseException:
+        if os.path.exists(staging):
+            os.remove(staging)
+        raise
+    logger.info("Converted boundary layer %s to %s (%d features)", path, converted, len(frame))
+    return converted
+
+
+def read_converted(converted, columns=None, bbox=None):
+    """Features of a FlatGeobuf copy back in source order, without the order column."""
+    if columns is not None:
+        columns = list(columns) + [SOURCE_ROW_COLUMN]
+    frame = gpd.read_file(converted, columns=columns, bbox=tuple(bbox) if bbox is not None else None)
+    if SOURCE_ROW_COLUMN in frame.columns:
+        frame = frame.sort_values(SOURCE_ROW_COLUMN, kind='stable').drop(columns=SOURCE_ROW_COLUMN)
+    return frame.reset_index(drop=True)
+
+
+def media_layers(directories=CONVERTED_LAYER_DIRS):
+    """Every shapefile under the given MEDIA_ROOT folders, sorted."""
+    paths = []
+    for directory in directories:
+        for root, _, files in os.walk(os.path.join(settings.MEDIA_ROOT, directory)):
+            paths.extend(os.path.join(root, name) for name in files if name.lower().endswith('.shp'))
+    return sorted(paths)
+
+
+class BoundaryLayer:
+    """One parsed, reprojected layer plus the code indexes built over it."""
+
+    def __init__(self, path, crs):
+        source, self.signature = layer_source(path, crs)
+        frame = read_converted(source) if source != path else gpd.read_file(path)
+        if crs is not None and frame.crs is not None and frame.crs != crs:
+            frame = frame.to_crs(crs)
+        self.frame = frame
+        self.indexes = {}
+        self.lock = threading.Lock()
+
+    def code_index(self, columns):
+        with self.lock:
+            if columns not in self.indexes:
+                self.indexes[columns] = CodeIndex(self.frame, columns)
+            return self.indexes[columns]
+
+
+_layers = {}
+_layer_locks = {}
+_layers_lock = threading.Lock()
+
+
+def _layer(path, crs):
+    key = (os.path.abspath(path), crs)
+    with _layers_lock:
+        lock = _layer_locks.setdefault(key, threading.Lock())
+    # Per-layer lock: a slow village layer load does not block other layers
+    with lock:
+        layer = _layers.get(key)
+        if layer is None or layer.signature != layer_source(path, crs)[1]:
+            if layer is not None:
+                logger.info("Boundary layer %s changed on disk, reloading", path)
+            layer = BoundaryLayer(path, crs)
+            _layers[key] = layer
+            logger.info("Loaded boundary layer %s (%d features)", path, len(layer.frame))
+        return layer
+
+
+def load_layer(path, crs=WEB_CRS):
+    """
+    The layer at path, parsed once per process and reprojected to crs (None keeps
+    the file's CRS). A new modification time or size of any part of the file reloads it.
+    Returns a shallow copy: filter or add columns freely, but do not modify values in place.
+    """
+    return _layer(path, crs).frame.copy(deep=False)
+
+
+def indexed_layer(path, columns, crs=WEB_CRS):
+    """
+    (load_layer(path, crs), CodeIndex over columns), both from the same loaded version
+    so the index positions always match the frame. The index is built once per version.
+    """
+    layer = _layer(path, crs)
+    return layer.frame.copy(deep=False), layer.code_index(tuple(columns))
+
+
+def read_layer(path, columns=None, bbox=None, crs=WEB_CRS):
+    """
+    Only the requested columns (plus geometry) of the features intersecting bbox
+    ((minx, miny, maxx, maxy) in crs). A layer already in the cache is filtered in
+    memory; otherwise a converted FlatGeobuf copy in crs is read with its spatial
+    index, and anything else falls back to loading the whole layer into the cache.
+    """
+    key = (os.path.abspath(path), crs)
+    source, signature = layer_source(path, crs)
+    layer = _layers.get(key)
+    if (layer is None or layer.signature != signature) and source != path:
+        return read_converted(source, columns, bbox)
+
+    frame = _layer(path, crs).frame
+    if bbox is not None:
+        minx, miny, maxx, maxy = bbox
+        frame = frame.cx[minx:maxx, miny:maxy]
+    if columns is not None:
+        frame = frame[[column for column in columns if column in frame.columns] + [frame.geometry.name]]
+    return frame.copy(deep=False)
+
+
+def clear_layer_cache():
+    with _layers_lock:
+        _layers.clear()
+        _layer_locks.clear()
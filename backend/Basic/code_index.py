@@ -0,0 +1,68 @@
+import math
+import numpy as np
+
+
+def canonical_code(value):
+    """
+    Padding-insensitive key for an administrative code from a shapefile column or a
+    request: digit strings and integer-valued numbers become ints ('007', '7', 7 and
+    7.0 are all 7); anything else is its stripped, upper-cased text. None, NaN and
+    empty strings give None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, np.integer)) and not isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        if math.isnan(value):
+            return None
+        if float(value).is_integer():
+            return int(value)
+    text = str(value).strip().upper()
+    if not text:
+        return None
+    if text.isdigit():
+        return int(text)
+    return text
+
+
+class CodeIndex:
+    """
+    Canonical code -> row positions of a boundary layer, built in one pass over the
+    key columns. With several columns the key is the tuple of their canonical codes.
+    Lookups are dictionary hits, so a batch of codes becomes one GeoDataFrame.take.
+    """
+
+    def __init__(self, frame, columns):
+        self.columns = tuple(columns)
+        values = zip(*(frame[column].tolist() for column in self.columns))
+        groups = {}
+        for position, row in enumerate(values):
+            key = self.key(*row)
+            if key is not None:
+                groups.setdefault(key, []).append(position)
+        self.positions = {key: np.array(rows, dtype=np.int64) for key, rows in groups.items()}
+
+    def __len__(self):
+        return len(self.positions)
+
+    def key(self, *codes):
+        keys = tuple(canonical_code(code) for code in codes)
+        if any(key is None for key in keys):
+            return None
+        return keys[0] if len(keys) == 1 else keys
+
+    def take(self, keys):
+        """
+        Row positions for every key in request order (repeats included) and the
+        list of keys that matched nothing. Keys are canonical (see key()).
+        """
+        chunks, missing = [], []
+        for key in keys:
+            rows = self.positions.get(key)
+            if rows is None:
+                missing.append(key)
+            else:
+                chunks.append(rows)
+        positions = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int64)
+        return positions, missing
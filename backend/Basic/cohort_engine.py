@@ -0,0 +1,195 @@
+import re
+import logging
+import numpy as np
+from django.db.models import Q
+from .models import PopulationCohort
+
+logger = logging.getLogger(__name__)
+
+
+COHORT_BASE_YEAR = 2011
+GENDERS = ('female', 'male')
+
+# Default annual rates keyed by the lower bound of the age group they start at;
+# a group takes the entry with the largest key not above its own lower bound.
+# Mortality roughly follows the 2011 SRS abridged life table, fertility the 2011 ASFR (TFR ~2.3).
+DEFAULT_MORTALITY = {
+    0: 0.011, 5: 0.0009, 10: 0.0007, 15: 0.001, 20: 0.0014, 25: 0.0017, 30: 0.0021, 35: 0.0028,
+    40: 0.0039, 45: 0.0056, 50: 0.0085, 55: 0.0125, 60: 0.019, 65: 0.029, 70: 0.045, 75: 0.07, 80: 0.13,
+}
+DEFAULT_FERTILITY = {0: 0.0, 15: 0.03, 20: 0.17, 25: 0.14, 30: 0.07, 35: 0.03, 40: 0.01, 45: 0.003, 50: 0.0}
+DEFAULT_MIGRATION = {0: 0.0}
+# Male births per female birth
+SEX_RATIO_AT_BIRTH = 1.08
+
+
+def age_group_bounds(labels):
+    """
+    Sorts age group labels ('0-4', '5-9', ..., '80+') by lower bound.
+    Returns (labels, lower bounds, widths) with an infinite width for the open last group.
+    """
+    parsed = []
+    for label in set(labels):
+        match = re.match(r'\s*(\d+)', str(label))
+        if match:
+            parsed.append((int(match.group(1)), label))
+        else:
+            logger.warning("Skipping unparseable age group %r", label)
+    parsed.sort()
+    lower = np.array([bound for bound, _ in parsed], dtype=np.float64)
+    widths = np.append(np.diff(lower), np.inf)
+    return [label for _, label in parsed], lower, widths
+
+
+RATE_OVERRIDES = ('mortality', 'fertility', 'migration')
+
+
+def _finite_rate(value):
+    if isinstance(value, bool):
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if np.isfinite(value) else None
+
+
+def validate_rates(rates):
+    """
+    Checks the shape of a Cohort_projection rates override: an object with optional
+    'mortality' / 'fertility' / 'migration' objects of {age_group: annual rate} and a
+    positive 'sex_ratio_at_birth'. Raises ValueError naming the offending key.
+    """
+    if rates is None:
+        return
+    if not isinstance(rates, dict):
+        raise ValueError("projection rates must be an object")
+    unknown = set(rates) - set(RATE_OVERRIDES) - {'sex_ratio_at_birth'}
+    if unknown:
+        raise ValueError(f"Unknown projection keys: {', '.join(sorted(map(str, unknown)))}")
+    for key in RATE_OVERRIDES:
+        overrides = rates.get(key)
+        if overrides is None:
+            continue
+        if not isinstance(overrides, dict):
+            raise ValueError(f"projection.{key} must be an object of age group: annual rate")
+        for label, value in overrides.items():
+            if _finite_rate(value) is None:
+                raise ValueError(f"projection.{key}[{label!r}] must be a number")
+    if 'sex_ratio_at_birth' in rates:
+        value = _finite_rate(rates['sex_ratio_at_birth'])
+        if value is None or value <= 0:
+            raise ValueError("projection.sex_ratio_at_birth must be a positive number")
+
+
+def _rate_by_age(table, lower, overrides, labels):
+    # Default table lookup by lower bound, then per-label overrides from the request
+    keys = np.array(sorted(table), dtype=np.float64)
+    values = np.array([table[key] for key in sorted(table)], dtype=np.float64)
+    rates = values[np.maximum(np.searchsorted(keys, lower, side='right') - 1, 0)]
+    for i, label in enumerate(labels):
+        if overrides and label in overrides:
+            rates[i] = float(overrides[label])
+    return rates
+
+
+def leslie_matrix(labels, lower, widths, rates=None):
+    """
+    Annual cohort-component transition matrix over the stacked [female, male] age groups.
+    Each year a group loses its mortality, gains its net migration, and moves
+    1/width of its survivors to the next group; the open last group keeps its
+    survivors. Births from female groups enter the first group of each sex.
+    rates may override 'mortality', 'fertility' and 'migration' per age group label
+    and 'sex_ratio_at_birth'.
+    """
+    rates = rates or {}
+    n = len(labels)
+    mortality = _rate_by_age(DEFAULT_MORTALITY, lower, rates.get('mortality'), labels)
+    fertility = _rate_by_age(DEFAULT_FERTILITY, lower, rates.get('fertility'), labels)
+    migration = _rate_by_age(DEFAULT_MIGRATION, lower, rates.get('migration'), labels)
+    sex_ratio = float(rates.get('sex_ratio_at_birth', SEX_RATIO_AT_BIRTH))
+
+    retained = (1 - mortality) * (1 + migration)
+    advance = np.where(np.isfinite(widths), 1 / widths, 0.0)
+
+    block = np.diag(retained * (1 - advance))
+    block[np.arange(1, n), np.arange(n - 1)] = (retained * advance)[:-1]
+
+    matrix = np.zeros((2 * n, 2 * n))
+    matrix[:n, :n] = block
+    matrix[n:, n:] = block
+    matrix[0, :n] += fertility / (1 + sex_ratio)
+    matrix[n, :n] += fertility * sex_ratio / (1 + sex_ratio)
+    return matrix
+
+
+def matrix_powers(matrix, offsets):
+    """(len(offsets), k, k) stack of matrix ** t for each non-negative offset t."""
+    offsets = np.asarray(offsets, dtype=np.int64)
+    powers = np.empty((len(offsets),) + matrix.shape)
+    current = np.eye(len(matrix))
+    step = 0
+    for i in np.argsort(offsets, kind='stable'):
+        while step < offsets[i]:
+            current = current @ matrix
+            step += 1
+        powers[i] = current
+    return powers
+
+
+def base_structure(location_filter):
+    """
+    2011 age x gender structure of every village matching location_filter.
+    Returns (labels, lower, widths, structure) with structure a (villages, 2 * groups)
+    array laid out as [female groups, male groups].
+    """
+    rows = list(PopulationCohort.objects.filter(location_filter & Q(year=COHORT_BASE_YEAR)).values_list(
+        'village_code', 'age_group', 'gender', 'population'
+    ))
+    labels, lower, widths = age_group_bounds(row[1] for row in rows)
+    group = {label: i for i, label in enumerate(labels)}
+    villages = {}
+    structure = np.zeros((0, 2 * len(labels)))
+    cells = []
+    for village_code, age_group, gender, population in rows:
+        gender = gender.lower()
+        if age_group in group and gender in GENDERS:
+            row = villages.setdefault(village_code, len(villages))
+            cells.append((row, GENDERS.index(gender) * len(labels) + group[age_group], population))
+    if cells:
+        cells = np.array(cells, dtype=np.int64)
+        structure = np.zeros((len(villages), 2 * len(labels)))
+        np.add.at(structure, (cells[:, 0], cells[:, 1]), cells[:, 2])
+    return labels, lower, widths, structure
+
+
+def Cohort_projection(location_filter, years, rates=None):
+    """
+    Projects the 2011 cohort structure of the selected villages to every requested
+    year in one batched einsum (years x transitions x villages) over the powers of
+    the annual Leslie matrix. Returns the CohortView 'cohort' list
+    ([{'year', 'data': {age_group: {'male', 'female', 'total'}, 'total': {...}}}]).
+    Raises ValueError for malformed rates (see validate_rates) or years before 2011.
+    """
+    validate_rates(rates)
+    labels, lower, widths, structure = base_structure(location_filter)
+    years = sorted(set(int(year) for year in years))
+    if not len(structure):
+        return [{'year': year, 'data': {}} for year in years]
+
+    offsets = np.array(years) - COHORT_BASE_YEAR
+    if (offsets < 0).any():
+        raise ValueError(f"Cohort projections start at {COHORT_BASE_YEAR}")
+    powers = matrix_powers(leslie_matrix(labels, lower, widths, rates), offsets)
+    projected = np.rint(np.einsum('tij,vj->ti', powers, structure, optimize=True)).astype(np.int64)
+
+    n = len(labels)
+    output = []
+    for year, state in zip(years, projected.tolist()):
+        data = {}
+        for i, label in enumerate(labels):
+            data[label] = {'male': state[n + i], 'female': state[i], 'total': state[i] + state[n + i]}
+        female, male = sum(state[:n]), sum(state[n:])
+        data['total'] = {'male': male, 'female': female, 'total': male + female}
+        output.append({'year': year, 'data': data})
+    return output
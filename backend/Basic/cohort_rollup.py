@@ -0,0 +1,69 @@
+import logging
+from itertools import islice
+from django.db import transaction
+from django.db.models import Sum
+from .models import PopulationCohort, PopulationCohortRollup
+
+logger = logging.getLogger(__name__)
+
+
+# Rollup levels, coarsest last, with the PopulationCohort code columns each one keeps
+ROLLUP_LEVELS = {
+    'subdistrict': ('state_code', 'district_code', 'subdistrict_code'),
+    'district': ('state_code', 'district_code'),
+    'state': ('state_code',),
+}
+
+
+def rebuild_cohort_rollups(batch_size=5000):
+    """
+    Replaces every PopulationCohortRollup row with fresh GROUP BY sums of PopulationCohort.
+    Grouped rows are streamed and written batch_size at a time, so memory stays
+    bounded by one batch whatever the level.
+    """
+    counts = {}
+    with transaction.atomic():
+        PopulationCohortRollup.objects.all().delete()
+        for level, columns in ROLLUP_LEVELS.items():
+            grouped = PopulationCohort.objects.values(*columns, 'year', 'age_group', 'gender').annotate(
+                population_sum=Sum('population')
+            ).order_by()
+            rollups = (
+                PopulationCohortRollup(
+                    level=level,
+                    year=row['year'],
+                    age_group=row['age_group'],
+                    gender=row['gender'],
+                    population=row['population_sum'],
+                    **{column: row[column] for column in columns},
+                )
+                for row in grouped.iterator(chunk_size=batch_size)
+            )
+            counts[level] = 0
+            while batch := list(islice(rollups, batch_size)):
+                PopulationCohortRollup.objects.bulk_create(batch, batch_size=batch_size)
+                counts[level] += len(batch)
+            logger.info("Cohort rollup %s: %d rows", level, counts[level])
+    return counts
+
+
+def cohort_rollup_level(villages, subdistrict, district, state, selection=None):
+    """
+    Coarsest rollup level that answers the CohortView filter exactly, or None when
+    the request names villages (or nothing) and must read village rows.
+    A rollup level keeps every code column at or above it, so the view's Q filter
+    runs against it as-is.
+    """
+    if selection:
+        if selection.get('village_codes'):
+            return None
+        if selection.get('subdistrict_codes'):
+            return 'subdistrict'
+        return 'district' if selection.get('district_codes') else None
+    if villages:
+        return None
+    if subdistrict:
+        return 'subdistrict'
+    if district:
+        return 'district'
+    return 'state' if state else None
@@ -0,0 +1,63 @@
+import logging
+import numpy as np
+from .service import (
+    TIME_SERIES_METHODS, coefficients_for_codes, project_arrays, selection_arrays, _summarise_projection,
+)
+from .forecast_cube import cube_population_selection
+
+logger = logging.getLogger(__name__)
+
+
+BATCH_METHODS = TIME_SERIES_METHODS + ('Demographic',)
+
+
+def _forecast_selections(base_year, years, methods, items, coefficients, rates):
+    results = {}
+    for name, arrays in items:
+        results[name] = {}
+        for method in methods:
+            if method == 'Demographic':
+                _, populations, matrix = project_arrays(method, base_year, years, arrays, rates=rates)
+            else:
+                _, populations, matrix = project_arrays(method, base_year, years, arrays, coefficients[method])
+            results[name][method] = _summarise_projection(populations, matrix, years)
+    return results
+
+
+def Forecast_batch(base_year, years, selections, methods, rates=None):
+    """
+    Forecasts many named compact selections in one call.
+    selections is {name: selection}, methods a subset of BATCH_METHODS and rates
+    the demographic dict when 'Demographic' is requested.
+    Selections the forecast cube covers are gathered from it; the rest share one
+    coefficient fetch and are projected in the request process: the per-method
+    work is vectorized NumPy, so shipping arrays to worker processes would cost
+    more than it saves.
+    Returns {name: {method: {"2011": base, year: total}}}.
+    """
+    unknown = [method for method in methods if method not in BATCH_METHODS]
+    if unknown:
+        raise ValueError(f"Unknown forecast methods: {', '.join(unknown)}")
+    if 'Demographic' in methods and rates is None:
+        raise ValueError("Demographic rates are required for the Demographic method")
+
+    results = {}
+    pending = []
+    for name, selection in selections.items():
+        cached = cube_population_selection(methods, base_year, years, selection, rates)
+        if cached:
+            results[name] = cached
+        else:
+            pending.append((name, selection_arrays(selection)))
+
+    if not pending:
+        return results
+
+    subdistricts = np.unique(np.concatenate([arrays[2] for _, arrays in pending]))
+    coefficients = coefficients_for_codes(subdistricts) if set(methods) & set(TIME_SERIES_METHODS) else None
+
+    logger.info("Forecasting %d selections (%d villages)", len(pending), sum(len(arrays[0]) for _, arrays in pending))
+    results.update(_forecast_selections(base_year, years, methods, pending, coefficients, rates))
+
+    # Keep the caller's selection order
+    return {name: results[name] for name in selections}
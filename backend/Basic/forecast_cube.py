@@ -0,0 +1,209 @@
+import os
+import json
+import shutil
+import logging
+import threading
+import numpy as np
+from datetime import datetime
+from django.conf import settings
+from .service import TIME_SERIES_METHODS, coefficient_version, coefficients_for_codes, demographic_rates, project_arrays
+from .village_index import get_village_index, select_villages
+
+logger = logging.getLogger(__name__)
+
+
+# Every method and year the cube materializes; column 0 (2011) is the base population
+CUBE_BASE_YEAR = 2011
+CUBE_YEARS = tuple(range(2011, 2062))
+CUBE_METHODS = TIME_SERIES_METHODS + ('Demographic',)
+
+# Demographic rates baked into the cube, in the same per-10000 units the Demographic view receives
+DEFAULT_DEMOGRAPHIC_RATES = getattr(settings, 'FORECAST_CUBE_DEMOGRAPHIC_RATES', {
+    'birthRate': 200,
+    'deathRate': 70,
+    'emigrationRate': 0,
+    'immigrationRate': 0,
+})
+
+CURRENT_FILE = 'CURRENT'
+
+
+def cube_directory():
+    return getattr(settings, 'FORECAST_CUBE_DIR', os.path.join(settings.BASE_DIR, 'forecast_cube'))
+
+
+class ForecastCube:
+    """
+    Read-only view of one cube version.
+    populations.npy is an int64 (methods, years, villages) memmap so every
+    (method, year) column is contiguous on disk; village_code.npy holds the
+    sorted village codes of its last axis. Villages a method drops (no growth
+    coefficients for their subdistrict) are stored as zeros. The time-series
+    methods are only served while the growth coefficient table still has the
+    version the cube was built from.
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.version = self.meta['version']
+        self.years = self.meta['years']
+        self.methods = self.meta['methods']
+        self.rates = self.meta['demographic_rates']
+        self.village_code = np.load(os.path.join(path, 'village_code.npy'))
+        self.populations = np.load(os.path.join(path, 'populations.npy'), mmap_mode='r')
+        self._year_column = {year: i for i, year in enumerate(self.years)}
+
+    def __len__(self):
+        return len(self.village_code)
+
+    def lookup(self, village_codes):
+        """(positions, found) of the given codes along the village axis."""
+        codes = np.asarray(village_codes, dtype=np.int64)
+        if not len(self):
+            return np.zeros(len(codes), dtype=np.int64), np.zeros(len(codes), dtype=bool)
+        positions = np.minimum(np.searchsorted(self.village_code, codes), len(self) - 1)
+        return positions, self.village_code[positions] == codes
+
+    def covers(self, method, base_year, years, rates=None):
+        if method not in self.methods or int(base_year) != CUBE_BASE_YEAR:
+            return False
+        if any(int(year) not in self._year_column for year in years):
+            return False
+        if method == 'Demographic':
+            return rates is not None and all(np.isclose(rates[key], self.rates[key]) for key in self.rates)
+        return self.meta.get('coefficient_version') == coefficient_version()
+
+    def totals(self, method, years, positions):
+        """{"2011": base, year: total} over the villages at positions, same shape as the live forecast."""
+        columns = self.populations[self.methods.index(method)]
+        output = {"2011": int(columns[0, positions].sum(dtype=np.int64))}
+        for year in years:
+            output[year] = int(columns[self._year_column[int(year)], positions].sum(dtype=np.int64))
+        return output
+
+
+_cube = {}
+_cube_lock = threading.Lock()
+
+
+def current_version():
+    try:
+        with open(os.path.join(cube_directory(), CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def get_forecast_cube():
+    """
+    The cube CURRENT points at, or None before the first build. The pointer is
+    re-read on every call so a rebuild in another process is picked up at once.
+    """
+    version = current_version()
+    if version is None:
+        return None
+    with _cube_lock:
+        cube = _cube.get('cube')
+        if cube is None or cube.version != version:
+            try:
+                cube = ForecastCube(os.path.join(cube_directory(), version))
+            except FileNotFoundError:
+                logger.warning("Forecast cube %s is missing, run build_forecast_cube", version)
+                return None
+            _cube['cube'] = cube
+            logger.info("Opened forecast cube %s (%d villages)", version, len(cube))
+        return cube
+
+
+def cube_population_selection(methods, base_year, years, selection, rates=None):
+    """
+    Answers a compact-selection forecast from the cube with a gather-and-sum.
+    Returns {method: {"2011": base, year: total}}, or None when there is no cube
+    or it cannot answer exactly (other years, other demographic rates, villages
+    newer than the cube) so callers recompute.
+    """
+    cube = get_forecast_cube()
+    if cube is None or not all(cube.covers(method, base_year, years, rates) for method in methods):
+        return None
+    index = get_village_index()
+    positions, found = cube.lookup(index.village_code[select_villages(selection)])
+    if not found.all():
+        logger.info("Forecast cube %s is missing %d selected villages", cube.version, int((~found).sum()))
+        return None
+    return {method: cube.totals(method, years, positions) for method in methods}
+
+
+def build_forecast_cube(rates=None, chunk_size=50000, keep=2):
+    """
+    Projects every village for every CUBE_METHODS x CUBE_YEARS into a new cube
+    version, then swaps CURRENT to it. The version is written to a temporary
+    directory and renamed into place, so readers only ever see complete cubes.
+    Returns the new version name.
+    """
+    rates = demographic_rates(rates or DEFAULT_DEMOGRAPHIC_RATES)
+    index = get_village_index()
+    village_ids = index.village_code.astype(np.int64)
+    populations = index.population_2011.astype(np.int64)
+    subdistricts = index.subdistrict_code.astype(np.int64)
+    coefficients = coefficients_for_codes(subdistricts)
+    coefficients_built_from = coefficient_version()
+
+    directory = cube_directory()
+    os.makedirs(directory, exist_ok=True)
+    version = f"v{datetime.now():%Y%m%d%H%M%S%f}-{os.getpid()}"
+    staging = os.path.join(directory, f".{version}.tmp")
+    os.makedirs(staging)
+
+    try:
+        cube = np.lib.format.open_memmap(
+            os.path.join(staging, 'populations.npy'), mode='w+', dtype=np.int64,
+            shape=(len(CUBE_METHODS), len(CUBE_YEARS), len(village_ids)),
+        )
+        for start in range(0, len(village_ids), chunk_size):
+            stop = min(start + chunk_size, len(village_ids))
+            arrays = (village_ids[start:stop], populations[start:stop], subdistricts[start:stop])
+            for m, method in enumerate(CUBE_METHODS):
+                if method == 'Demographic':
+                    ids, _, matrix = project_arrays(method, CUBE_BASE_YEAR, CUBE_YEARS, arrays, rates=rates)
+                else:
+                    ids, _, matrix = project_arrays(method, CUBE_BASE_YEAR, CUBE_YEARS, arrays, coefficients[method])
+                # Dropped villages keep the zeros open_memmap starts with
+                columns = start + np.searchsorted(arrays[0], ids)
+                cube[m][:, columns] = matrix.T
+        cube.flush()
+        del cube
+
+        np.save(os.path.join(staging, 'village_code.npy'), village_ids)
+        with open(os.path.join(staging, 'meta.json'), 'w') as f:
+            json.dump({
+                'version': version,
+                'base_year': CUBE_BASE_YEAR,
+                'years': list(CUBE_YEARS),
+                'methods': list(CUBE_METHODS),
+                'demographic_rates': rates,
+                'coefficient_version': coefficients_built_from,
+                'villages': len(village_ids),
+                'built_at': datetime.now().isoformat(timespec='seconds'),
+            }, f, indent=2)
+
+        os.rename(staging, os.path.join(directory, version))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    pointer = os.path.join(directory, f".{CURRENT_FILE}.tmp")
+    with open(pointer, 'w') as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(directory, CURRENT_FILE))
+    logger.info("Forecast cube %s built for %d villages", version, len(village_ids))
+
+    _prune_versions(directory, version, keep)
+    return version
+
+
+def _prune_versions(directory, current, keep):
+    # Workers that still map an older version keep reading it until they reopen; unlinking is safe on POSIX
+    versions = sorted(name for name in os.listdir(directory) if name.startswith('v') and name != current and os.path.isdir(os.path.join(directory, name)))
+    for name in versions[:len(versions) - max(keep - 1, 0)]:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
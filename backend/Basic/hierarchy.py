@@ -0,0 +1,252 @@
+import os
+import gzip
+import json
+import shutil
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+from django.conf import settings
+from .models import Basic_state, Basic_district, Basic_subdistrict, Basic_village
+from .village_index import village_codes
+
+logger = logging.getLogger(__name__)
+
+
+class HierarchyLevel:
+    """
+    One level of the administrative tree as parallel arrays, ordered by
+    (parent code, name, code) so the children of any parent are one contiguous
+    slice found with np.searchsorted. rank is each row's position in the
+    level-wide (name, code) order, used to merge several parents' slices.
+    """
+
+    def __init__(self, code_field, name_field, parent_field, rows, extra_fields=()):
+        self.code_field = code_field
+        self.name_field = name_field
+        self.parent_field = parent_field
+        self.extra_fields = tuple(extra_fields)
+
+        by_name = sorted(rows, key=lambda row: (row[1], row[0]))
+        rank = {row[0]: i for i, row in enumerate(by_name)}
+        ordered = sorted(by_name, key=lambda row: (row[2] if parent_field else 0, rank[row[0]]))
+
+        self.code = np.array([row[0] for row in ordered], dtype=np.int64)
+        self.name = [row[1] for row in ordered]
+        self.parent = np.array([row[2] if parent_field else 0 for row in ordered], dtype=np.int64)
+        self.extra = [tuple(row[3:]) for row in ordered]
+        self.rank = np.array([rank[row[0]] for row in ordered], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.code)
+
+    def positions(self, parents=None):
+        """Row positions of the children of parents (every row when None), in name order."""
+        if parents is None:
+            return np.argsort(self.rank, kind='stable')
+        parents = np.unique(np.asarray(parents, dtype=np.int64))
+        starts = np.searchsorted(self.parent, parents, side='left')
+        stops = np.searchsorted(self.parent, parents, side='right')
+        slices = [np.arange(start, stop) for start, stop in zip(starts.tolist(), stops.tolist()) if stop > start]
+        if not slices:
+            return np.zeros(0, dtype=np.int64)
+        if len(slices) == 1:
+            return slices[0]
+        positions = np.concatenate(slices)
+        return positions[np.argsort(self.rank[positions], kind='stable')]
+
+    def records(self, positions):
+        """The rows as the ModelSerializer dicts the location endpoints always returned."""
+        codes = self.code[positions].tolist()
+        parents = self.parent[positions].tolist()
+        output = []
+        for i, code, parent in zip(positions.tolist(), codes, parents):
+            record = {self.code_field: code, self.name_field: self.name[i]}
+            record.update(zip(self.extra_fields, self.extra[i]))
+            if self.parent_field:
+                record[self.parent_field] = parent
+            output.append(record)
+        return output
+
+    def snapshot(self, positions, parent_codes=None):
+        """
+        Columnar rows at positions (kept in (parent, name) order). With the codes of
+        the parent level's snapshot rows, 'parent' holds indices into them instead of codes.
+        """
+        positions = np.sort(positions)
+        columns = {'code': self.code[positions].tolist(), 'name': [self.name[i] for i in positions.tolist()]}
+        for j, field in enumerate(self.extra_fields):
+            columns[field] = [self.extra[i][j] for i in positions.tolist()]
+        if parent_codes is not None:
+            sorter = np.argsort(parent_codes, kind='stable')
+            columns['parent'] = sorter[np.searchsorted(parent_codes, self.parent[positions], sorter=sorter)].tolist()
+        return columns
+
+    def digest(self, hasher):
+        hasher.update(self.code.tobytes())
+        hasher.update(self.parent.tobytes())
+        hasher.update("\x1f".join(self.name).encode())
+        hasher.update(repr(self.extra).encode())
+
+
+class LocationHierarchy:
+    """
+    Read-only state -> district -> subdistrict -> village tree loaded with one
+    values_list query per table. version is a digest of the whole tree and
+    changes whenever any row does.
+    """
+
+    def __init__(self, states, districts, subdistricts, villages):
+        self.levels = {
+            'state': HierarchyLevel('state_code', 'state_name', None, [row + (None,) for row in states]),
+            'district': HierarchyLevel('district_code', 'district_name', 'state_code', districts),
+            'subdistrict': HierarchyLevel('subdistrict_code', 'subdistrict_name', 'district_code', subdistricts),
+            'village': HierarchyLevel(
+                'village_code', 'village_name', 'subdistrict_code', villages, extra_fields=('population_2011',),
+            ),
+        }
+        hasher = hashlib.sha1()
+        for level in self.levels.values():
+            level.digest(hasher)
+        self.version = hasher.hexdigest()
+
+    def children(self, level, parents=None):
+        """Serialized rows of a level, restricted to the given parent codes and sorted by name."""
+        level = self.levels[level]
+        return level.records(level.positions(parents))
+
+    def etag(self, level, parents=None):
+        """Strong ETag of children(level, parents): the tree version plus the normalized request."""
+        key = 'all' if parents is None else ",".join(str(code) for code in sorted(set(parents)))
+        return '"' + hashlib.sha1(f"{self.version}:{level}:{key}".encode()).hexdigest() + '"'
+
+
+_hierarchy = {}
+_hierarchy_lock = threading.Lock()
+
+
+def get_location_hierarchy():
+    """Process-wide LocationHierarchy, built from the Basic tables on first use."""
+    with _hierarchy_lock:
+        if 'tree' not in _hierarchy:
+            _hierarchy['tree'] = LocationHierarchy(
+                list(Basic_state.objects.values_list('state_code', 'state_name')),
+                list(Basic_district.objects.values_list('district_code', 'district_name', 'state_code')),
+                list(Basic_subdistrict.objects.values_list('subdistrict_code', 'subdistrict_name', 'district_code')),
+                list(Basic_village.objects.values_list(
+                    'village_code', 'village_name', 'subdistrict_code', 'population_2011',
+                )),
+            )
+            logger.info("Built location hierarchy with %d villages", len(_hierarchy['tree'].levels['village']))
+        return _hierarchy['tree']
+
+
+def invalidate_location_hierarchy(*args, **kwargs):
+    """Drops the cached tree; wired to Basic table signals and safe to call after bulk loads."""
+    with _hierarchy_lock:
+        _hierarchy.clear()
+        _filtered_snapshots.clear()
+
+
+def parent_codes(values):
+    """Parent codes from a request value: one code or a list of ints / digit strings."""
+    if not isinstance(values, (list, tuple)):
+        values = [values]
+    return [code for code in village_codes(values) if code != -1]
+
+
+SNAPSHOT_LEVELS = ('state', 'district', 'subdistrict', 'village')
+
+
+def snapshot_directory():
+    return getattr(settings, 'HIERARCHY_SNAPSHOT_DIR', os.path.join(settings.BASE_DIR, 'hierarchy_snapshot'))
+
+
+def hierarchy_snapshot(hierarchy, state_codes=None):
+    """
+    The whole tree (or the states in state_codes) as flat columns per level.
+    Rows are ordered by (parent, name) and 'parent' is the index of the parent
+    row in the level above, so a cascade filter is one pass over an int array.
+    """
+    output = {'version': hierarchy.version}
+    parents = None
+    for name in SNAPSHOT_LEVELS:
+        level = hierarchy.levels[name]
+        if parents is None:
+            positions = np.arange(len(level)) if state_codes is None else np.flatnonzero(np.isin(level.code, state_codes))
+            columns = level.snapshot(positions)
+        else:
+            positions = np.flatnonzero(np.isin(level.parent, parents))
+            columns = level.snapshot(positions, parents)
+        output[name] = columns
+        parents = np.array(columns['code'], dtype=np.int64)
+    return output
+
+
+def snapshot_etag(hierarchy, state_codes=None):
+    return hierarchy.etag('snapshot', state_codes)
+
+
+# Filtered snapshots kept in memory per process, most recently used last
+FILTERED_SNAPSHOT_CACHE_SIZE = 16
+_filtered_snapshots = OrderedDict()
+
+
+def compressed_hierarchy_snapshot(state_codes=None):
+    """
+    Gzipped JSON of hierarchy_snapshot(). Returns (etag, gzip bytes).
+    The full tree is built once per tree version and kept under
+    snapshot_directory()/<version>/all.json.gz; state-filtered snapshots are cut
+    from the cached tree and only kept in a small in-process LRU. Codes that are
+    not states are dropped before keying, so junk parameters share one entry.
+    """
+    hierarchy = get_location_hierarchy()
+    if state_codes is not None:
+        state_codes = np.unique(np.asarray(state_codes, dtype=np.int64))
+        state_codes = state_codes[np.isin(state_codes, hierarchy.levels['state'].code)].tolist()
+        return _filtered_snapshot(hierarchy, state_codes)
+
+    etag = snapshot_etag(hierarchy)
+    directory = os.path.join(snapshot_directory(), hierarchy.version)
+    path = os.path.join(directory, "all.json.gz")
+    try:
+        with open(path, 'rb') as f:
+            return etag, f.read()
+    except FileNotFoundError:
+        pass
+
+    payload = json.dumps(hierarchy_snapshot(hierarchy), separators=(',', ':')).encode()
+    data = gzip.compress(payload, compresslevel=9, mtime=0)
+    os.makedirs(directory, exist_ok=True)
+    staging = f"{path}.{os.getpid()}.tmp"
+    with open(staging, 'wb') as f:
+        f.write(data)
+    os.replace(staging, path)
+    logger.info("Wrote hierarchy snapshot %s (%d bytes, %d compressed)", path, len(payload), len(data))
+    _prune_snapshots(hierarchy.version)
+    return etag, data
+
+
+def _filtered_snapshot(hierarchy, state_codes):
+    key = (hierarchy.version, tuple(state_codes))
+    with _hierarchy_lock:
+        if key in _filtered_snapshots:
+            _filtered_snapshots.move_to_end(key)
+            return _filtered_snapshots[key]
+
+    payload = json.dumps(hierarchy_snapshot(hierarchy, state_codes), separators=(',', ':')).encode()
+    entry = (snapshot_etag(hierarchy, state_codes), gzip.compress(payload, mtime=0))
+    with _hierarchy_lock:
+        _filtered_snapshots[key] = entry
+        while len(_filtered_snapshots) > FILTERED_SNAPSHOT_CACHE_SIZE:
+            _filtered_snapshots.popitem(last=False)
+    return entry
+
+
+def _prune_snapshots(current):
+    # Versions are content digests, so an older directory can never be served again
+    directory = snapshot_directory()
+    for name in os.listdir(directory):
+        if name != current and os.path.isdir(os.path.join(directory, name)):
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from Basic.service import demographic_rates
+from Basic.forecast_cube import DEFAULT_DEMOGRAPHIC_RATES, CUBE_METHODS, CUBE_YEARS, build_forecast_cube
+
+
+class Command(BaseCommand):
+    help = "Precomputes every forecast method for every village and year into a new forecast cube version"
+
+    def add_arguments(self, parser):
+        # Demographic rates in the per-10000 units the Demographic endpoint receives
+        parser.add_argument('--birth-rate', type=float, default=DEFAULT_DEMOGRAPHIC_RATES['birthRate'])
+        parser.add_argument('--death-rate', type=float, default=DEFAULT_DEMOGRAPHIC_RATES['deathRate'])
+        parser.add_argument('--emigration-rate', type=float, default=DEFAULT_DEMOGRAPHIC_RATES['emigrationRate'])
+        parser.add_argument('--immigration-rate', type=float, default=DEFAULT_DEMOGRAPHIC_RATES['immigrationRate'])
+        parser.add_argument('--chunk-size', type=int, default=50000, help="Villages projected per pass")
+        parser.add_argument('--keep', type=int, default=2, help="Cube versions kept on disk, including the new one")
+
+    def handle(self, *args, **options):
+        rates = {
+            'birthRate': options['birth_rate'],
+            'deathRate': options['death_rate'],
+            'emigrationRate': options['emigration_rate'],
+            'immigrationRate': options['immigration_rate'],
+        }
+        try:
+            demographic_rates(rates)
+        except ValueError as e:
+            raise CommandError(str(e))
+        version = build_forecast_cube(rates, chunk_size=options['chunk_size'], keep=options['keep'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Forecast cube {version} built: {len(CUBE_METHODS)} methods x {len(CUBE_YEARS)} years"
+        ))
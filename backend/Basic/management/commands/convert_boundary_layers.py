@@ -0,0 +1,33 @@
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from Basic.boundary_layers import CONVERTED_LAYER_DIRS, convert_layer, converted_path, layer_source, media_layers
+
+
+class Command(BaseCommand):
+    help = "Converts media shapefiles to FlatGeobuf (EPSG:4326, packed R-tree) next to the originals"
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help=f"Shapefiles relative to MEDIA_ROOT (default: every .shp under {', '.join(CONVERTED_LAYER_DIRS)})")
+        parser.add_argument('--force', action='store_true', help="Convert even when the FlatGeobuf copy is up to date")
+
+    def handle(self, *args, **options):
+        paths = [os.path.join(settings.MEDIA_ROOT, path) for path in options['paths']] or media_layers()
+        missing = [path for path in paths if not os.path.exists(path)]
+        if missing:
+            raise CommandError(f"Layers not found: {', '.join(missing)}")
+
+        converted = skipped = 0
+        for path in paths:
+            if not options['force'] and layer_source(path)[0] == converted_path(path):
+                skipped += 1
+                continue
+            try:
+                convert_layer(path)
+            except Exception as e:
+                self.stderr.write(f"Could not convert {path}: {e}")
+                continue
+            converted += 1
+            self.stdout.write(f"Converted {path}")
+        self.stdout.write(self.style.SUCCESS(f"{converted} layers converted, {skipped} already up to date"))
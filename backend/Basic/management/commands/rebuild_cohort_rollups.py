@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from Basic.cohort_rollup import rebuild_cohort_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the subdistrict, district and state PopulationCohortRollup tables; run after cohort imports"
+
+    def handle(self, *args, **options):
+        counts = rebuild_cohort_rollups()
+        summary = ", ".join(f"{level}: {count}" for level, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt cohort rollups ({summary})"))
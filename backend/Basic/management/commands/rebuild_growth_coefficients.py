@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from Basic.models import SubdistrictGrowthCoefficient
+from Basic.service import population_history, growth_coefficients, coefficient_rows, clear_coefficient_cache
+from Basic.forecast_cube import get_forecast_cube
+
+
+class Command(BaseCommand):
+    help = "Rebuilds SubdistrictGrowthCoefficient from the Population_2011 census history"
+
+    def handle(self, *args, **options):
+        codes, history = population_history()
+        rows = coefficient_rows(growth_coefficients(codes, history))
+
+        with transaction.atomic():
+            SubdistrictGrowthCoefficient.objects.all().delete()
+            SubdistrictGrowthCoefficient.objects.bulk_create(
+                [SubdistrictGrowthCoefficient(**row) for row in rows],
+                batch_size=2000,
+            )
+
+        clear_coefficient_cache()
+        self.stdout.write(self.style.SUCCESS(f"Stored growth coefficients for {len(rows)} subdistricts"))
+
+        cube = get_forecast_cube()
+        if cube is not None:
+            self.stdout.write(self.style.WARNING(
+                f"Forecast cube {cube.version} was built from the previous coefficients; its time-series "
+                f"methods are not served until `manage.py build_forecast_cube` is run again"
+            ))
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-16 20:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Basic", "0005_populationcohort"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SubdistrictGrowthCoefficient",
+            fields=[
+                (
+                    "subdistrict_code",
+                    models.IntegerField(primary_key=True, serialize=False),
+                ),
+                ("arithmetic_growth_rate", models.FloatField()),
+                ("geometric_growth_rate", models.FloatField()),
+                ("incremental_d_mean", models.FloatField()),
+                ("incremental_m_mean", models.FloatField()),
+                ("exponential_growth_rate", models.FloatField()),
+                ("population_2011", models.BigIntegerField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.6 on 2026-10-16 21:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Basic", "0006_subdistrictgrowthcoefficient"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PopulationCohortRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("level", models.CharField(max_length=20)),
+                ("state_code", models.BigIntegerField()),
+                ("district_code", models.BigIntegerField(null=True)),
+                ("subdistrict_code", models.BigIntegerField(null=True)),
+                ("year", models.IntegerField()),
+                ("age_group", models.CharField(max_length=20)),
+                ("gender", models.CharField(max_length=10)),
+                ("population", models.BigIntegerField()),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["level", "year"], name="Basic_popul_level_b4066b_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-16 21:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Basic", "0007_populationcohortrollup"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="populationcohort",
+            index=models.Index(
+                fields=["year", "village_code"], name="Basic_popul_year_1de7f1_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="populationcohort",
+            index=models.Index(
+                fields=["year", "subdistrict_code"], name="Basic_popul_year_46633c_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="populationcohort",
+            index=models.Index(
+                fields=["year", "district_code"], name="Basic_popul_year_090a42_idx"
+            ),
+        ),
+    ]
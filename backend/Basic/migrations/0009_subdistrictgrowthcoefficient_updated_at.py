@@ -0,0 +1,20 @@
+# Generated by Django 5.1.6 on 2026-10-16 23:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Basic", "0008_populationcohort_location_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="subdistrictgrowthcoefficient",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -48,6 +48,21 @@ class Population_2011(models.Model):
            return f"{self.region_name},{self.subdistrict_code},{self.population_1951},{self.population_1961},{self.population_1971},{self.population_1981},{self.population_1991},{self.population_2001},{self.population_2011}"
 
 
+class SubdistrictGrowthCoefficient(models.Model):
+    # Precomputed from Population_2011 by `manage.py rebuild_growth_coefficients`
+    subdistrict_code = models.IntegerField(primary_key=True)
+    arithmetic_growth_rate = models.FloatField()
+    geometric_growth_rate = models.FloatField()
+    incremental_d_mean = models.FloatField()
+    incremental_m_mean = models.FloatField()
+    exponential_growth_rate = models.FloatField()
+    population_2011 = models.BigIntegerField()
+    # Set on every save and bulk_create; max(updated_at) versions the table across processes
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.subdistrict_code},{self.arithmetic_growth_rate},{self.geometric_growth_rate},{self.incremental_d_mean},{self.incremental_m_mean},{self.exponential_growth_rate}"
+
 
 class PopulationCohort(models.Model):
     state_code = models.BigIntegerField()
@@ -61,10 +76,38 @@ class PopulationCohort(models.Model):
     gender = models.CharField(max_length=10)
     population = models.BigIntegerField()
 
+    class Meta:
+        # CohortView filters every year range by one of these location columns
+        indexes = [
+            models.Index(fields=['year', 'village_code']),
+            models.Index(fields=['year', 'subdistrict_code']),
+            models.Index(fields=['year', 'district_code']),
+        ]
+
     def __str__(self):
         return f"{self.region_name}, {self.year}, {self.age_group}, {self.gender}: {self.population}"
 
 
+class PopulationCohortRollup(models.Model):
+    # PopulationCohort summed per subdistrict, district or state by `manage.py rebuild_cohort_rollups`.
+    # Codes finer than the level are null, so CohortView's location filters apply unchanged.
+    level = models.CharField(max_length=20)
+    state_code = models.BigIntegerField()
+    district_code = models.BigIntegerField(null=True)
+    subdistrict_code = models.BigIntegerField(null=True)
+
+    year = models.IntegerField()
+    age_group = models.CharField(max_length=20)
+    gender = models.CharField(max_length=10)
+    population = models.BigIntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=['level', 'year'])]
+
+    def __str__(self):
+        return f"{self.level} {self.state_code}/{self.district_code}/{self.subdistrict_code}, {self.year}, {self.age_group}, {self.gender}: {self.population}"
+
+
 
 
 #Below model for boundary of state , district, subdistrict, villages
@@ -1,86 +1,655 @@
-import math
+import time
+import logging
+import threading
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Max
 from .models import *
-
-def Arithmetic_d_values(subdistrict):
-    subdistrict_new_ids = [x['id'] for x in subdistrict]
-    print("subdistrict_new_ids", subdistrict_new_ids)
-        
-        # Get population data for subdistricts
-    subdistrict_2011 = list(Population_2011.objects.filter(
-        subdistrict_code__in=subdistrict_new_ids
-    ).values(
-        'subdistrict_code', 'population_1951', 'population_1961', 
-        'population_1971', 'population_1981', 'population_1991', 
-        'population_2001', 'population_2011'
-    ))
-    
-    print("subdistrict_2011",subdistrict_2011)
-    
-    # Calculate the total population for each decade
-   
-    d_values = []
-    for subdistrict in subdistrict_2011:
-        d_mean=(subdistrict['population_2011']-subdistrict['population_1951'])/6
-        annual_growth_rate =math.floor(d_mean / 10)
-        temp={
-            "subdistrict_code": subdistrict['subdistrict_code'],
-            "annual_growth_rate":annual_growth_rate,
-            "total_p7":subdistrict['population_2011']
-        }
-        d_values.append(temp)
-
-    return d_values
-
-
-        
-def Arithmetic_population_single_year(base_year,single_year,villages,subdistrict):
-    output_year = {}
-    ans=Arithmetic_d_values(subdistrict)
-    print("ans ", ans)
+from .village_index import get_village_index, select_villages, village_codes
+
+logger = logging.getLogger(__name__)
+
+
+# Decadal census columns of Population_2011, oldest first
+HISTORY_FIELDS = (
+    'population_1951', 'population_1961', 'population_1971', 'population_1981',
+    'population_1991', 'population_2001', 'population_2011'
+)
+HISTORY_YEARS = np.array([1951, 1961, 1971, 1981, 1991, 2001, 2011], dtype=np.int64)
+
+# Coefficients each time-series method needs per subdistrict
+PROJECTION_FIELDS = {
+    'Arithmetic': ('annual_growth_rate', 'total_p7'),
+    'Geometric': ('annual_growth_rate', 'total_p7'),
+    'Incremental': ('d_mean', 'm_mean', 'total_p7'),
+    'Exponential': ('growth_rate', 'total_p7'),
+}
+TIME_SERIES_METHODS = tuple(PROJECTION_FIELDS)
+
+
+def population_history(subdistrict_ids=None):
+    """
+    Fetches the 1951-2011 decadal history of the given subdistricts (all of them
+    when subdistrict_ids is None) in one query.
+    Returns (codes, history): an int64 array of subdistrict codes and an int64
+    (subdistricts, 7) matrix of populations in HISTORY_FIELDS order.
+    """
+    queryset = Population_2011.objects.all()
+    if subdistrict_ids is not None:
+        queryset = queryset.filter(subdistrict_code__in=subdistrict_ids)
+    rows = list(queryset.values_list('subdistrict_code', *HISTORY_FIELDS))
+    table = np.array(rows, dtype=np.int64).reshape(-1, len(HISTORY_FIELDS) + 1)
+    return table[:, 0], table[:, 1:]
+
+
+def growth_coefficients(codes, history, base_year=2011):
+    """
+    Computes the coefficients of all four time-series methods in one vectorized pass.
+    Returns {method: {'subdistrict_code': codes, <field>: array, ...}} with one
+    entry per subdistrict row of history.
+    """
+    p = history.astype(np.float64)
+    p7 = history[:, -1]
+    d = np.diff(history, axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Arithmetic: mean decadal increase, floored to a whole annual increase
+        arithmetic_rate = np.floor(((history[:, -1] - history[:, 0]) / 6) / 10)
+
+        # Geometric: geometric mean of the positive decadal growth percentages
+        g = np.where(history[:, :-1] != 0, (d * 100) / history[:, :-1], 0)
+        valid = g > 0
+        count = valid.sum(axis=1)
+        product = np.where(valid, g, 1.0).prod(axis=1)
+        geometric_rate = np.where(count > 0, np.power(product, 1 / np.maximum(count, 1)), 0.0)
+        geometric_rate = np.round(geometric_rate, 4)
+
+        # Incremental: mean decadal increase and mean incremental increase
+        d_mean = d.sum(axis=1) / 6
+        m_mean = np.diff(d, axis=1).sum(axis=1) / 5
+
+        # Exponential: batched least-squares slope of log10(p) against (year - base_year)
+        x = (HISTORY_YEARS - base_year).astype(np.float64)
+        y = np.log(p) / np.log(10)
+        n = len(x)
+        growth_rate = ((n * (y * x).sum(axis=1)) - x.sum() * y.sum(axis=1)) / (n * (x ** 2).sum() - x.sum() ** 2)
+
+    return {
+        'Arithmetic': {'subdistrict_code': codes, 'annual_growth_rate': arithmetic_rate, 'total_p7': p7},
+        'Geometric': {'subdistrict_code': codes, 'annual_growth_rate': geometric_rate, 'total_p7': p7},
+        'Incremental': {'subdistrict_code': codes, 'd_mean': d_mean, 'm_mean': m_mean, 'total_p7': p7},
+        'Exponential': {'subdistrict_code': codes, 'growth_rate': growth_rate, 'total_p7': p7},
+    }
+
+
+# SubdistrictGrowthCoefficient column for each (method, field) of growth_coefficients()
+COEFFICIENT_COLUMNS = {
+    ('Arithmetic', 'annual_growth_rate'): 'arithmetic_growth_rate',
+    ('Geometric', 'annual_growth_rate'): 'geometric_growth_rate',
+    ('Incremental', 'd_mean'): 'incremental_d_mean',
+    ('Incremental', 'm_mean'): 'incremental_m_mean',
+    ('Exponential', 'growth_rate'): 'exponential_growth_rate',
+}
+COEFFICIENT_FIELDS = tuple(dict.fromkeys(COEFFICIENT_COLUMNS.values())) + ('population_2011',)
+
+# Process-wide copy of SubdistrictGrowthCoefficient, loaded on first use. Saves in this
+# process clear it through signals; rebuilds in other processes (the management command)
+# are noticed by re-reading the table version at most every COEFFICIENT_CHECK_SECONDS.
+COEFFICIENT_CHECK_SECONDS = getattr(settings, 'GROWTH_COEFFICIENT_CHECK_SECONDS', 30)
+_coefficient_cache = {}
+_coefficient_lock = threading.Lock()
+
+
+def coefficient_rows(coefficients):
+    """Flattens growth_coefficients() output into SubdistrictGrowthCoefficient kwargs."""
+    codes = coefficients['Arithmetic']['subdistrict_code'].tolist()
+    columns = {column: coefficients[method][field].tolist() for (method, field), column in COEFFICIENT_COLUMNS.items()}
+    columns['population_2011'] = coefficients['Arithmetic']['total_p7'].tolist()
+    return [
+        dict(subdistrict_code=code, **{column: values[i] for column, values in columns.items()})
+        for i, code in enumerate(codes)
+    ]
+
+
+def _coefficient_table_version():
+    # Row count and last write time: a rebuild or any admin edit changes one of them
+    stats = SubdistrictGrowthCoefficient.objects.aggregate(rows=Count('pk'), updated=Max('updated_at'))
+    return f"{stats['rows']}:{stats['updated'].isoformat() if stats['updated'] else ''}"
+
+
+def _coefficient_entry():
+    # (sorted codes, {column: array}, table version) for every subdistrict in the precomputed table
+    with _coefficient_lock:
+        now = time.monotonic()
+        if 'table' in _coefficient_cache and now - _coefficient_cache['checked'] >= COEFFICIENT_CHECK_SECONDS:
+            _coefficient_cache['checked'] = now
+            if _coefficient_table_version() != _coefficient_cache['table'][2]:
+                logger.info("Growth coefficients changed, reloading")
+                del _coefficient_cache['table']
+        if 'table' not in _coefficient_cache:
+            version = _coefficient_table_version()
+            rows = list(SubdistrictGrowthCoefficient.objects.order_by('subdistrict_code').values_list('subdistrict_code', *COEFFICIENT_FIELDS))
+            table = np.array(rows, dtype=np.float64).reshape(-1, len(COEFFICIENT_FIELDS) + 1)
+            columns = {column: table[:, i + 1] for i, column in enumerate(COEFFICIENT_FIELDS)}
+            columns['population_2011'] = columns['population_2011'].astype(np.int64)
+            _coefficient_cache['table'] = (table[:, 0].astype(np.int64), columns, version)
+            _coefficient_cache['checked'] = now
+            logger.info("Loaded %d subdistrict growth coefficients", len(table))
+        return _coefficient_cache['table']
+
+
+def _coefficient_table():
+    codes, columns, _ = _coefficient_entry()
+    return codes, columns
+
+
+def clear_coefficient_cache(*args, **kwargs):
+    """Drops the in-process coefficient table; wired to SubdistrictGrowthCoefficient signals."""
+    with _coefficient_lock:
+        _coefficient_cache.clear()
+
+
+def coefficient_version():
+    """Version of the coefficient table the current forecasts are computed from."""
+    return _coefficient_entry()[2]
+
+
+def subdistrict_coefficients(subdistrict):
+    """Coefficients of every method for the {'id': code} subdistrict dicts of a request."""
+    return coefficients_for_codes([int(x['id']) for x in subdistrict])
+
+
+def coefficients_for_codes(subdistrict_ids):
+    """
+    Coefficients of every method for the given subdistrict codes, read from the
+    cached SubdistrictGrowthCoefficient table. Subdistricts missing from the table
+    (e.g. before the first rebuild) fall back to one census history fetch.
+    """
+    subdistrict_ids = np.unique(np.asarray(subdistrict_ids, dtype=np.int64))
+    codes, columns = _coefficient_table()
+    position = np.clip(np.searchsorted(codes, subdistrict_ids), 0, max(len(codes) - 1, 0))
+    found = (position < len(codes)) & (codes[position] == subdistrict_ids) if len(codes) else np.zeros(len(subdistrict_ids), dtype=bool)
+    rows = position[found]
+
+    coefficients = {
+        method: {'subdistrict_code': codes[rows], 'total_p7': columns['population_2011'][rows]}
+        for method in TIME_SERIES_METHODS
+    }
+    for (method, field), column in COEFFICIENT_COLUMNS.items():
+        coefficients[method][field] = columns[column][rows]
+
+    missing = subdistrict_ids[~found]
+    if len(missing):
+        logger.warning("No precomputed growth coefficients for %s, run rebuild_growth_coefficients", missing.tolist())
+        computed = growth_coefficients(*population_history(missing.tolist()))
+        for method, table in computed.items():
+            for field, values in table.items():
+                coefficients[method][field] = np.concatenate([coefficients[method][field], values])
+    return coefficients
+
+
+def _d_values(method, subdistrict):
+    # Row-per-subdistrict view of one method's coefficients (legacy *_d_values shape)
+    table = subdistrict_coefficients(subdistrict)[method]
+    columns = {field: table[field].tolist() for field in PROJECTION_FIELDS[method]}
+    rows = []
+    for i, code in enumerate(table['subdistrict_code'].tolist()):
+        row = {'subdistrict_code': code}
+        for field in PROJECTION_FIELDS[method]:
+            row[field] = columns[field][i]
+        rows.append(row)
+    return rows
+
+
+def _coefficient_arrays(table, subdistrict_ids, fields):
+    """
+    Aligns per-subdistrict coefficients with the subdistrict id of every village.
+    Subdistricts with a non-finite coefficient or a zero 2011 population (a zero
+    census count makes the exponential fit and the p / total_p7 share undefined)
+    are treated as having none.
+    Returns a boolean mask of the villages that have coefficients and a dict of
+    float64 arrays (one per field) for those villages.
+    """
+    codes = np.asarray(table['subdistrict_code'], dtype=np.int64)
+    ids = np.asarray(subdistrict_ids, dtype=np.int64)
+    columns = {field: np.asarray(table[field], dtype=np.float64) for field in fields}
+    usable = np.ones(len(codes), dtype=bool)
+    for field, column in columns.items():
+        usable &= np.isfinite(column)
+        if field == 'total_p7':
+            usable &= column > 0
+    if not usable.all():
+        logger.warning("Skipping subdistricts with undefined growth coefficients: %s", codes[~usable].tolist())
+
+    if len(codes):
+        order = np.argsort(codes, kind='stable')
+        rows = order[np.minimum(np.searchsorted(codes[order], ids), len(codes) - 1)]
+        mask = (codes[rows] == ids) & usable[rows]
+    else:
+        rows = np.zeros(len(ids), dtype=np.int64)
+        mask = np.zeros(len(ids), dtype=bool)
+    arrays = {field: column[rows[mask]] for field, column in columns.items()}
+    return mask, arrays
+
+
+def _projection_matrix(method, populations, coefficients, offsets):
+    """
+    Projection engine shared by every method.
+    populations is (villages,), each coefficient is (villages,) or a scalar and
+    offsets is (years,) = year - base_year. Returns a (villages, years) int64 matrix,
+    truncated towards zero exactly like int() in the old per-village loops.
+    """
+    value = np.asarray(populations, dtype=np.float64)[:, None]
+    t = np.asarray(offsets, dtype=np.float64)[None, :]
+
+    def col(name):
+        coefficient = np.asarray(coefficients[name], dtype=np.float64)
+        return coefficient.reshape(-1, 1) if coefficient.ndim else coefficient
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if method == 'Arithmetic':
+            projected = value + ((col('annual_growth_rate') * t) * (value / col('total_p7')))
+        elif method == 'Geometric':
+            n = t / 10
+            projected = value * np.power(1 + (col('annual_growth_rate') / 100), n)
+        elif method == 'Incremental':
+            n = t / 10
+            k = value / col('total_p7')
+            projected = value + k * n * col('d_mean') + ((n * (n + 1)) * col('m_mean') / 2) * k
+        elif method == 'Exponential':
+            projected = value * np.exp(col('growth_rate') * t)
+        elif method == 'Demographic':
+            projected = value + (value * t * (col('birth_rate') - col('death_rate'))) + (t * (col('emigration_rate') - col('immigration_rate')))
+        else:
+            raise ValueError(f"Unknown projection method: {method}")
+
+    return np.trunc(projected).astype(np.int64)
+
+
+def village_arrays(villages):
+    """(village_ids, populations, subdistrict_ids) arrays from {'id', 'population', 'subDistrictId'} dicts."""
+    ids = np.array(village_codes(village['id'] for village in villages), dtype=np.int64)
+    populations = np.array([village['population'] for village in villages], dtype=np.int64)
+    subdistricts = np.array(village_codes(village.get('subDistrictId') for village in villages), dtype=np.int64)
+    return ids, populations, subdistricts
+
+
+def selection_arrays(selection):
+    """
+    (village_ids, populations, subdistrict_ids) arrays for a compact selection
+    ({'village_codes': [...], 'subdistrict_codes': [...], 'district_codes': [...]}),
+    resolved entirely from the in-memory village index.
+    """
+    index = get_village_index()
+    positions = select_villages(selection)
+    return (
+        index.village_code[positions].astype(np.int64),
+        index.population_2011[positions].astype(np.int64),
+        index.subdistrict_code[positions].astype(np.int64),
+    )
+
+
+def project_arrays(method, base_year, years, arrays, coefficients=None, rates=None):
+    """
+    Builds the village x year projection matrix for one method.
+    arrays is (village_ids, populations, subdistrict_ids) from village_arrays() or
+    selection_arrays(), coefficients the method's entry from growth_coefficients()
+    for the time-series methods and rates the demographic dict (birth_rate,
+    death_rate, emigration_rate, immigration_rate).
+    Villages whose subdistrict has no coefficients are dropped, as before.
+    Returns (village_ids, populations, matrix).
+    """
+    ids, populations, subdistricts = arrays
+    offsets = np.asarray(years, dtype=np.int64) - int(base_year)
+
+    if method == 'Demographic':
+        coefficients = rates
+    else:
+        mask, coefficients = _coefficient_arrays(coefficients, subdistricts, PROJECTION_FIELDS[method])
+        ids = ids[mask]
+        populations = populations[mask]
+
+    return ids, populations, _projection_matrix(method, populations, coefficients, offsets)
+
+
+def project_villages(method, base_year, years, villages, coefficients=None, rates=None):
+    """project_arrays() for a list of village dicts."""
+    return project_arrays(method, base_year, years, village_arrays(villages), coefficients, rates)
+
+
+def _summarise_projection(populations, matrix, years):
+    """Collapses a projection matrix into the {"2011": base, year: total} response."""
+    totals = matrix.sum(axis=0)
+    output = {"2011": int(populations.sum())}
+    for year, total in zip(years, totals):
+        output[year] = int(total)
+    return output
+
+
+# Admin levels a projection can be disaggregated to
+GROUP_LEVELS = ('village', 'subdistrict', 'district')
+
+
+def group_keys(village_ids, group_by):
+    """Group code of every village for group_by; villages unknown to the village index get -1."""
+    village_ids = np.asarray(village_ids, dtype=np.int64)
+    if group_by == 'village':
+        return village_ids
+    if group_by not in GROUP_LEVELS:
+        raise ValueError(f"Unknown group level: {group_by}")
+    index = get_village_index()
+    positions, found = index.lookup(village_ids)
+    column = index.subdistrict_code if group_by == 'subdistrict' else index.district_code
+    return np.where(found, column[positions], -1).astype(np.int64)
+
+
+def group_projections(projections, base_year, years, group_by):
+    """
+    Columnar, per-group view of {method: (village_ids, populations, matrix)}.
+    Returns {'group_by', 'codes', 'years', <method>: year x group matrix}, where
+    'years' starts with base_year and codes are shared by every method (a group
+    whose villages a method dropped sums to 0 there).
+    """
+    keys = {method: group_keys(ids, group_by) for method, (ids, _, _) in projections.items()}
+    codes = np.unique(np.concatenate(list(keys.values()) or [np.zeros(0, dtype=np.int64)]))
+    output = {'group_by': group_by, 'codes': codes.tolist(), 'years': [int(base_year)] + [int(year) for year in years]}
+    for method, (_, populations, matrix) in projections.items():
+        sums = np.zeros((len(codes), matrix.shape[1] + 1), dtype=np.int64)
+        np.add.at(sums, np.searchsorted(codes, keys[method]), np.column_stack([populations, matrix]))
+        output[method] = sums.T.tolist()
+    return output
+
+
+def Time_series_population_groups(base_year, years, arrays, coefficients, group_by):
+    """All four time-series methods for (village_ids, populations, subdistrict_ids), summed per group_by."""
+    projections = {
+        method: project_arrays(method, base_year, years, arrays, coefficients[method])
+        for method in TIME_SERIES_METHODS
+    }
+    return group_projections(projections, base_year, years, group_by)
+
+
+def Demographic_population_groups(base_year, years, arrays, rates, group_by):
+    """Demographic projection for (village_ids, populations, subdistrict_ids), summed per group_by."""
+    projections = {'demographic': project_arrays('Demographic', base_year, years, arrays, rates=rates)}
+    return group_projections(projections, base_year, years, group_by)
+
+
+# Request keys of the demographic rates (per 10000) and the rates dict key of each
+DEMOGRAPHIC_RATE_FIELDS = {
+    'birthRate': 'birth_rate',
+    'deathRate': 'death_rate',
+    'emigrationRate': 'emigration_rate',
+    'immigrationRate': 'immigration_rate',
+}
+
+
+def demographic_rates(demographic):
+    """
+    Rates dict for project_arrays() from a request's demographic object
+    ({'birthRate', 'deathRate', 'emigrationRate', 'immigrationRate'} per 10000).
+    Raises ValueError when a rate is missing or not a finite number.
+    """
+    if not isinstance(demographic, dict):
+        raise ValueError("demographic must be an object")
+    rates = {}
+    for field, key in DEMOGRAPHIC_RATE_FIELDS.items():
+        if field not in demographic:
+            raise ValueError(f"demographic.{field} is required")
+        value = demographic[field]
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not np.isfinite(value):
+            raise ValueError(f"demographic.{field} must be a number")
+        rates[key] = value / 10000
+    return rates
+
+
+# Upper bound on birth x death x emigration x immigration combinations per sweep
+MAX_SWEEP_SCENARIOS = 10000
+
+
+def sweep_values(spec):
+    """
+    Values of one swept rate: a number, a list of numbers or an inclusive
+    {'start', 'stop', 'step'} range, all in request (per 10000) units.
+    """
+    if isinstance(spec, dict):
+        start, stop, step = float(spec['start']), float(spec['stop']), float(spec.get('step') or 1)
+        if step <= 0:
+            raise ValueError("step must be positive")
+        # Inclusive of stop, tolerant to float steps
+        count = int(np.floor((stop - start) / step + 1e-9)) + 1
+        if count > MAX_SWEEP_SCENARIOS:
+            raise ValueError(f"Range has {count} values, the limit is {MAX_SWEEP_SCENARIOS}")
+        return start + step * np.arange(max(count, 0))
+    values = np.atleast_1d(np.asarray(spec, dtype=np.float64)).ravel()
+    if len(values) > MAX_SWEEP_SCENARIOS:
+        raise ValueError(f"List has {len(values)} values, the limit is {MAX_SWEEP_SCENARIOS}")
+    return values
+
+
+def Demographic_population_sweep(base_year, years, arrays, birth_rates, death_rates, emigration_rates, immigration_rates):
+    """
+    Demographic projection over the full grid of the given rate specs (see sweep_values).
+    Every scenario is projected per village and truncated exactly like the single
+    scenario path, broadcasting villages x scenarios x years in bounded chunks.
+    Returns {'scenarios': {rate: [...]}, 'years': [base_year, ...], 'values': scenario x year}.
+    """
+    _, populations, _ = arrays
+    axes = [sweep_values(spec) for spec in (birth_rates, death_rates, emigration_rates, immigration_rates)]
+    # Check the grid size before meshgrid allocates it
+    size = int(np.prod([len(axis) for axis in axes]))
+    if size > MAX_SWEEP_SCENARIOS:
+        raise ValueError(f"Sweep has {size} scenarios, the limit is {MAX_SWEEP_SCENARIOS}")
+    birth, death, emigration, immigration = (axis.ravel() for axis in np.meshgrid(*axes, indexing='ij'))
+
+    value = populations.astype(np.float64)[:, None, None]
+    t = (np.asarray(years, dtype=np.int64) - int(base_year)).astype(np.float64)[None, None, :]
+    natural = (birth / 10000 - death / 10000)[None, :, None]
+    migration = (emigration / 10000 - immigration / 10000)[None, :, None]
+
+    totals = np.zeros((len(birth), len(years)), dtype=np.int64)
+    chunk = max(1, 8000000 // max(len(populations) * len(years), 1))
+    for start in range(0, len(birth), chunk):
+        stop = start + chunk
+        projected = value + (value * t * natural[:, start:stop]) + (t * migration[:, start:stop])
+        totals[start:stop] = np.trunc(projected).astype(np.int64).sum(axis=0)
+
+    base = np.full((len(birth), 1), int(populations.sum()), dtype=np.int64)
+    return {
+        'scenarios': {
+            'birthRate': birth.tolist(),
+            'deathRate': death.tolist(),
+            'emigrationRate': emigration.tolist(),
+            'immigrationRate': immigration.tolist(),
+        },
+        'years': [int(base_year)] + [int(year) for year in years],
+        'values': np.hstack([base, totals]).tolist(),
+    }
+
+
+# Monte Carlo defaults: draws per subdistrict and the percentile bands returned
+MONTE_CARLO_DRAWS = 10000
+MAX_MONTE_CARLO_DRAWS = 100000
+MONTE_CARLO_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def _integer_option(name, value):
+    if isinstance(value, bool):
+        raise ValueError(f"{name} must be an integer")
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer")
+    if not np.isfinite(number) or number != int(number):
+        raise ValueError(f"{name} must be an integer")
+    return int(number)
+
+
+def monte_carlo_options(spec):
+    """
+    Validated keyword arguments for Monte_carlo_population_bands from a request's
+    monte_carlo value (true or {'draws', 'seed', 'percentiles'}); None when off.
+    Raises ValueError for unknown keys or out-of-range values.
+    """
+    if not isinstance(spec, dict):
+        return {} if spec else None
+    unknown = set(spec) - {'draws', 'seed', 'percentiles'}
+    if unknown:
+        raise ValueError(f"Unknown monte_carlo options: {', '.join(sorted(map(str, unknown)))}")
+    options = {}
+    if 'draws' in spec:
+        options['draws'] = _integer_option('draws', spec['draws'])
+        if not 0 < options['draws'] <= MAX_MONTE_CARLO_DRAWS:
+            raise ValueError(f"draws must be between 1 and {MAX_MONTE_CARLO_DRAWS}")
+    if 'seed' in spec:
+        options['seed'] = _integer_option('seed', spec['seed'])
+        if options['seed'] < 0:
+            raise ValueError("seed must be non-negative")
+    if 'percentiles' in spec:
+        percentiles = spec['percentiles']
+        if not isinstance(percentiles, (list, tuple)) or not percentiles:
+            raise ValueError("percentiles must be a non-empty list")
+        try:
+            percentiles = [float(q) for q in percentiles]
+        except (TypeError, ValueError):
+            raise ValueError("percentiles must be numbers")
+        if not all(0 <= q <= 100 for q in percentiles):
+            raise ValueError("percentiles must be between 0 and 100")
+        options['percentiles'] = percentiles
+    return options
+
+
+def decadal_growth_distribution(history):
+    """
+    Mean and standard deviation of each subdistrict's decadal log growth,
+    log(p[k+1] / p[k]) over the census decades. Decades with a non-positive
+    population are skipped; subdistricts with none left get (0, 0).
+    """
+    p = history.astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = np.log(p[:, 1:] / p[:, :-1])
+    valid = np.isfinite(growth)
+    count = valid.sum(axis=1)
+    growth = np.where(valid, growth, 0.0)
+    mean = np.where(count > 0, growth.sum(axis=1) / np.maximum(count, 1), 0.0)
+    spread = np.where(valid, (growth - mean[:, None]) ** 2, 0.0).sum(axis=1)
+    std = np.where(count > 1, np.sqrt(spread / np.maximum(count - 1, 1)), 0.0)
+    return mean, std
+
+
+def Monte_carlo_population_bands(base_year, years, arrays, draws=MONTE_CARLO_DRAWS, seed=0, percentiles=MONTE_CARLO_PERCENTILES):
+    """
+    Percentile bands of the selection total per year.
+    Each draw samples one decadal log growth per subdistrict from a normal fitted
+    to its 1951-2011 history and grows every village of that subdistrict with it,
+    so the total is sum_s P_s * exp(g_s * (year - base_year) / 10) over the
+    selected population P_s of each subdistrict. The RNG is seeded for
+    reproducible bands.
+    Returns {'years', 'percentiles', 'values': percentile x year, 'draws', 'seed'}.
+    """
+    draws = int(draws)
+    if not 0 < draws <= MAX_MONTE_CARLO_DRAWS:
+        raise ValueError(f"draws must be between 1 and {MAX_MONTE_CARLO_DRAWS}")
+    percentiles = [float(q) for q in percentiles]
+
+    _, populations, subdistricts = arrays
+    codes, inverse = np.unique(subdistricts, return_inverse=True)
+    selected = np.bincount(inverse, weights=populations, minlength=len(codes))
+
+    history_codes, history = population_history(codes.tolist())
+    mean, std = np.zeros(len(codes)), np.zeros(len(codes))
+    rows = np.searchsorted(codes, history_codes)
+    mean[rows], std[rows] = decadal_growth_distribution(history)
+    # Villages of subdistricts without census history stay flat
+    n = (np.asarray(years, dtype=np.int64) - int(base_year)) / 10
+
+    rng = np.random.default_rng(int(seed))
+    totals = np.empty((draws, len(n)))
+    chunk = max(1, 8000000 // max(len(codes) * len(n), 1))
+    for start in range(0, draws, chunk):
+        stop = min(start + chunk, draws)
+        growth = rng.normal(mean, std, size=(stop - start, len(codes)))
+        totals[start:stop] = np.einsum('s,dsy->dy', selected, np.exp(growth[:, :, None] * n[None, None, :]))
+
+    bands = np.rint(np.percentile(totals, percentiles, axis=0)).astype(np.int64)
+    base = np.full((len(percentiles), 1), int(populations.sum()), dtype=np.int64)
+    return {
+        'years': [int(base_year)] + [int(year) for year in years],
+        'percentiles': percentiles,
+        'values': np.hstack([base, bands]).tolist(),
+        'draws': draws,
+        'seed': int(seed),
+    }
+
+
+def _population_years(method, base_year, years, villages, coefficients=None, rates=None):
+    return _population_arrays(method, base_year, years, village_arrays(villages), coefficients, rates)
+
+
+def _population_arrays(method, base_year, years, arrays, coefficients=None, rates=None):
+    _, populations, matrix = project_arrays(method, base_year, years, arrays, coefficients, rates)
+    output = _summarise_projection(populations, matrix, years)
+    logger.debug("%s output %s", method, output)
+    return output
+
+
+def _range_years(start_year, end_year):
+    return list(range(int(start_year), int(end_year) + 1))
+
+
+def forecast_years(single_year, start_year, end_year):
+    """Years requested by a forecast payload: the single year, else the inclusive range."""
     if single_year:
-        target_year = int(single_year)
-        for village in villages: 
-            print("village", village)
-            village_id, value ,vill_sub_id= village['id'],village['population'],village['subDistrictId']
-            items= next(item for item in ans if item['subdistrict_code'] == vill_sub_id)
-            output_year[village_id] = {
-                "2011": value,
-                str(target_year): int(value + ((items['annual_growth_rate'] * (target_year - base_year)) * (value / items['total_p7'])))
-            }
-        print(f"output year {output_year}")    
-        Air_last_output={}
-        Air_last_output['2011']=sum([values['2011'] for values in output_year.values()])
-        Air_last_output[target_year]=sum([values[str(target_year)] for values in output_year.values()])
-        print('Air_last_output',Air_last_output)
-    return Air_last_output
+        return [int(single_year)]
+    if start_year and end_year:
+        return _range_years(start_year, end_year)
+    return []
 
-def Arithmetic_population_range(base_year, start_year, end_year, villages, subdistrict):
-    output_year = {}
-    ans = Arithmetic_d_values(subdistrict)
-    print("ans", ans)
 
-    # Compute the population projections for each village separately
-    for village in villages:
-        village_id = village['id']
-        value = village['population']
-        vill_sub_id = village['subDistrictId']
-        items = next((item for item in ans if item['subdistrict_code'] == vill_sub_id), None)
+def Time_series_population_selection(base_year, years, selection):
+    """All four time-series methods for a compact village selection."""
+    arrays = selection_arrays(selection)
+    coefficients = coefficients_for_codes(arrays[2])
+    return {
+        method: _population_arrays(method, base_year, years, arrays, coefficients[method])
+        for method in TIME_SERIES_METHODS
+    }
+
 
-        if items:
-            output_year[village_id] = {"2011": value}  # Store base population for 2011
-            for year in range(start_year, end_year + 1):
-                projected_value = int(value + ((items['annual_growth_rate'] * (year - base_year)) * (value / items['total_p7'])))
-                output_year[village_id][year] = projected_value
+def Demographic_population_selection(base_year, years, selection, rates):
+    """Demographic projection for a compact village selection; rates as from demographic_rates()."""
+    return _population_arrays('Demographic', base_year, years, selection_arrays(selection), rates=rates)
 
-    print(f"Output years Range {output_year}")
 
-    # Now sum the populations across all villages to get the final output
-    Air_last_output = {"2011": sum(values["2011"] for values in output_year.values())}
-    for year in range(start_year, end_year + 1):
-        Air_last_output[year] = sum(values[year] for values in output_year.values())
+def Time_series_population_single_year(base_year, single_year, villages, subdistrict):
+    coefficients = subdistrict_coefficients(subdistrict)
+    return {
+        method: _population_years(method, base_year, [int(single_year)], villages, coefficients[method])
+        for method in TIME_SERIES_METHODS
+    }
+
+
+def Time_series_population_range(base_year, start_year, end_year, villages, subdistrict):
+    coefficients = subdistrict_coefficients(subdistrict)
+    return {
+        method: _population_years(method, base_year, _range_years(start_year, end_year), villages, coefficients[method])
+        for method in TIME_SERIES_METHODS
+    }
+
+
+def Arithmetic_d_values(subdistrict):
+    return _d_values('Arithmetic', subdistrict)
+
+
+def Arithmetic_population_single_year(base_year,single_year,villages,subdistrict):
+    coefficients = subdistrict_coefficients(subdistrict)['Arithmetic']
+    return _population_years('Arithmetic', base_year, [int(single_year)], villages, coefficients)
+
+
+def Arithmetic_population_range(base_year, start_year, end_year, villages, subdistrict):
+    coefficients = subdistrict_coefficients(subdistrict)['Arithmetic']
+    return _population_years('Arithmetic', base_year, _range_years(start_year, end_year), villages, coefficients)
 
-    print(f"Air_last_output {Air_last_output}")
-    return Air_last_output
 
 ##### this is for special case to include 2025 always but currently it is implement in main site but it is correct 
 
@@ -120,382 +689,52 @@ def Arithmetic_population_range(base_year, start_year, end_year, villages, subdi
 #     return Air_last_output
 #####
 
-    
-
 
 def Geometric_d_values(subdistrict):
-    subdistrict_new_ids = [x['id'] for x in subdistrict]
-
-    # Fetch population data for given subdistricts
-    subdistrict_2011 = list(Population_2011.objects.filter(
-        subdistrict_code__in=subdistrict_new_ids
-    ).values(
-        'subdistrict_code', 'population_1951', 'population_1961', 
-        'population_1971', 'population_1981', 'population_1991', 
-        'population_2001', 'population_2011'
-    ))
-
-    g_values = []
-
-    for sub in subdistrict_2011:
-        p1, p2, p3, p4, p5, p6, p7 = (
-            sub['population_1951'], sub['population_1961'], sub['population_1971'],
-            sub['population_1981'], sub['population_1991'], sub['population_2001'],
-            sub['population_2011']
-        )
-
-        # Calculate decadal population differences
-        d1, d2, d3, d4, d5, d6 = [p2 - p1, p3 - p2, p4 - p3, p5 - p4, p6 - p5, p7 - p6]
-
-        # Calculate decadal growth rates
-        g1 = (d1 * 100) / p1 if p1 else 0
-        g2 = (d2 * 100) / p2 if p2 else 0
-        g3 = (d3 * 100) / p3 if p3 else 0
-        g4 = (d4 * 100) / p4 if p4 else 0
-        g5 = (d5 * 100) / p5 if p5 else 0
-        g6 = (d6 * 100) / p6 if p6 else 0
-
-        # Filter out non-positive growth rates
-        valid_growth_values = [g for g in [g1, g2, g3, g4, g5, g6] if g > 0]
-
-        if valid_growth_values:
-            # Calculate geometric mean only for positive values
-            product = 1
-            for g in valid_growth_values:
-                product *= g
-            annual_growth_rate = math.pow(product, 1 / len(valid_growth_values))
-        else:
-            # Handle case where no valid growth rates exist
-            annual_growth_rate = 0
-
-        # Append results
-        g_values.append({
-            'subdistrict_code': sub['subdistrict_code'],
-            'annual_growth_rate': round(annual_growth_rate, 4),  # Rounded for readability
-            'total_p7': p7
-        })
-
-    return g_values
+    return _d_values('Geometric', subdistrict)
 
 
 def Geometric_population_single_year(base_year,single_year,villages,subdistrict):
-    output_year = {}
-    ans = Geometric_d_values(subdistrict)
-    print(f"ans {ans}")
+    coefficients = subdistrict_coefficients(subdistrict)['Geometric']
+    return _population_years('Geometric', base_year, [int(single_year)], villages, coefficients)
 
-    if single_year:
-        target_year = int(single_year)
-        base_year = int(base_year)
-        n = (target_year-base_year)/10
-        for village in villages: 
-            print("village", village)
-            village_id, value ,vill_sub_id= village['id'],village['population'],village['subDistrictId']
-            items= next(item for item in ans if item['subdistrict_code'] == vill_sub_id)
-            output_year[village_id] = {
-                "2011": value,
-                str(target_year): int(value * (math.pow((1 + (items['annual_growth_rate']/100)), n)))
-            }
-        print(f"output year_g {output_year}")    
-        Air_last_output={}
-        Air_last_output['2011']=sum([values['2011'] for values in output_year.values()])
-        Air_last_output[target_year]=sum([values[str(target_year)] for values in output_year.values()])
-        print('Air_last_output_g',Air_last_output)
-    return Air_last_output
 
 def Geometric_population_range(base_year, start_year, end_year, villages, subdistrict):
-    output_year = {}
-    ans = Geometric_d_values(subdistrict)
-    print("ans-g", ans)
-    base_year = int(base_year)
-    start_year = int(start_year)
-    end_year = int(end_year)
-
-    # Compute the population projections for each village separately
-    for village in villages:
-        village_id = village['id']
-        value = village['population']
-        vill_sub_id = village['subDistrictId']
-        items = next((item for item in ans if item['subdistrict_code'] == vill_sub_id), None)
-
-        if items:
-            output_year[village_id] = {"2011": value}  # Store base population for 2011
-            for year in range(start_year, end_year + 1):
-                n = (year - base_year) / 10
-                projected_value =  int(value * (math.pow((1 + (items['annual_growth_rate']/100)), n)))
-                output_year[village_id][year] = projected_value
-
-    print(f"Output years Range {output_year}")
-
-    # Now sum the populations across all villages to get the final output
-    Air_last_output = {"2011": sum(values["2011"] for values in output_year.values())}
-    for year in range(start_year, end_year + 1):
-        Air_last_output[year] = sum(values[year] for values in output_year.values())
-
-    print(f"Air_last_output {Air_last_output}")
-    return Air_last_output
-   
+    coefficients = subdistrict_coefficients(subdistrict)['Geometric']
+    return _population_years('Geometric', base_year, _range_years(start_year, end_year), villages, coefficients)
 
-def Incremental_d_values(subdistrict):
-    subdistrict_new_ids = [x['id'] for x in subdistrict]
-
-    # Fetch population data for given subdistricts
-    subdistrict_2011 = list(Population_2011.objects.filter(
-        subdistrict_code__in=subdistrict_new_ids
-    ).values(
-        'subdistrict_code', 'population_1951', 'population_1961', 
-        'population_1971', 'population_1981', 'population_1991', 
-        'population_2001', 'population_2011'
-    ))
-    g_values = []
-    for sub in subdistrict_2011:
-        p1, p2, p3, p4, p5, p6, p7 = (
-            sub['population_1951'], sub['population_1961'], sub['population_1971'],
-            sub['population_1981'], sub['population_1991'], sub['population_2001'],
-            sub['population_2011']
-        )
-
-        # Calculate decadal population differences
-        d1, d2, d3, d4, d5, d6 = [p2 - p1, p3 - p2, p4 - p3, p5 - p4, p6 - p5, p7 - p6]
-
-        d_mean = (d1+d2+d3+d4+d5+d6) / 6
-
-        m1 = d2 - d1
-        m2 = d3 - d2
-        m3 = d4 - d3
-        m4 = d5 - d4
-        m5 = d6 - d5 
-        m_mean = (m1+m2+m3+m4+m5) / 5
-
-        g_values.append({
-            'subdistrict_code': sub['subdistrict_code'],
-            'd_mean': d_mean,
-            'm_mean': m_mean,
-            'total_p7': p7
-        })
-
-    return g_values
 
+def Incremental_d_values(subdistrict):
+    return _d_values('Incremental', subdistrict)
 
 
 def Incremental_population_single_year(base_year,single_year,villages,subdistrict):
-    output_year = {}
-    ans = Incremental_d_values(subdistrict)
-    print(f"ans_i {ans}")
+    coefficients = subdistrict_coefficients(subdistrict)['Incremental']
+    return _population_years('Incremental', base_year, [int(single_year)], villages, coefficients)
 
-    if single_year:
-        target_year = int(single_year)
-        base_year = int(base_year)
-        n = (target_year-base_year)/10
-        for village in villages: 
-            print("village", village)
-            village_id, value ,vill_sub_id= village['id'],village['population'],village['subDistrictId']
-           
-            items= next(item for item in ans if item['subdistrict_code'] == vill_sub_id)
-            k = value / items['total_p7']
-            output_year[village_id] = {
-                "2011": value,
-                str(target_year): int(value + k*n*items['d_mean'] + ((n*(n+1))*items['m_mean'] / 2)*k)
-            }
-        print(f"output year_g {output_year}")    
-        Air_last_output={}
-        Air_last_output['2011']=sum([values['2011'] for values in output_year.values()])
-        Air_last_output[target_year]=sum([values[str(target_year)] for values in output_year.values()])
-        print('Air_last_output_i',Air_last_output)
-    return Air_last_output
 
 def Incremental_population_range(base_year, start_year, end_year, villages, subdistrict):
-
-    output_year = {}
-    ans = Incremental_d_values(subdistrict)
-    print("ans-g", ans)
-    base_year = int(base_year)
-    start_year = int(start_year)
-    end_year = int(end_year)
-
-    # Compute the population projections for each village separately
-    for village in villages:
-        village_id = village['id']
-        value = village['population']
-        vill_sub_id = village['subDistrictId']
-        items = next((item for item in ans if item['subdistrict_code'] == vill_sub_id), None)
-        k = value / items['total_p7']
-
-        if items:
-            output_year[village_id] = {"2011": value}  # Store base population for 2011
-            for year in range(start_year, end_year + 1):
-                n = (year - base_year) / 10
-
-                projected_value = int(value + k*n*items['d_mean'] + ((n*(n+1))*items['m_mean'] / 2)*k)
-                output_year[village_id][year] = projected_value
-
-    print(f"Output years Range {output_year}")
-
-    # Now sum the populations across all villages to get the final output
-    Air_last_output = {"2011": sum(values["2011"] for values in output_year.values())}
-    for year in range(start_year, end_year + 1):
-        Air_last_output[year] = sum(values[year] for values in output_year.values())
-
-    print(f"Air_last_output {Air_last_output}")
-    return Air_last_output
-
+    coefficients = subdistrict_coefficients(subdistrict)['Incremental']
+    return _population_years('Incremental', base_year, _range_years(start_year, end_year), villages, coefficients)
 
 
 def Exponential_d_values(subdistrict):
-    subdistrict_new_ids = [x['id'] for x in subdistrict]
-    base_year = 2011
-    # Fetch population data for given subdistricts
-    subdistrict_2011 = list(Population_2011.objects.filter(
-        subdistrict_code__in=subdistrict_new_ids
-    ).values(
-        'subdistrict_code', 'population_1951', 'population_1961', 
-        'population_1971', 'population_1981', 'population_1991', 
-        'population_2001', 'population_2011'
-    ))
-    g_values = []
-    for sub in subdistrict_2011:
-        p1, p2, p3, p4, p5, p6, p7 = (
-            sub['population_1951'], sub['population_1961'], sub['population_1971'],
-            sub['population_1981'], sub['population_1991'], sub['population_2001'],
-            sub['population_2011']
-        )
-
-        x1 =  1951-base_year
-        x2 =   1961-base_year
-        x3 =  1971-base_year
-        x4 =  1981-base_year
-        x5 = 1991-base_year
-        x6 = 2001-base_year
-        x7 = 2011-base_year
-
-        y1 = math.log(p1,10)
-        y2 = math.log(p2, 10)
-        y3 = math.log(p3,10)
-        y4 = math.log(p4, 10)
-        y5 = math.log(p5,10)
-        y6 = math.log(p6,10)
-        y7 = math.log(p7,10)
-
-        x_i_sum = x1+x2+x3+x4+x5+x6+x7
-        y_i_sum = y1+y2+y3+y4+y5+y6+y7
-        x_i_square_sum = x1**2 + x2**2 + x3**2 + x4**2 + x5**2 + x6**2 + x7**2
-        x_y_prod_sum = x1*y1 + x2*y2 + x3*y3 + x4*y4 + x5*y5 + x6*y6 + x7*y7
-        x_sum_prod_y_sum = x_i_sum * y_i_sum
-
-
-        n = 7
-
-        growth_rate = ((n*x_y_prod_sum) - x_sum_prod_y_sum) / (n*x_i_square_sum - (x_i_sum**2)) # r
-
-        g_values.append({
-            'subdistrict_code': sub['subdistrict_code'],
-            'growth_rate': growth_rate,
-            'total_p7': p7
-        })
-    return g_values    
+    return _d_values('Exponential', subdistrict)
 
 
 def Exponential_population_single_year(base_year,single_year,villages,subdistrict):
-    output_year = {}
-    ans = Exponential_d_values(subdistrict)
-    print(f"ans_i {ans}")
-
-    if single_year:
-        target_year = int(single_year)
-        base_year = int(base_year)
-        t = (target_year-base_year)
-        for village in villages: 
-            print("village", village)
-            village_id, value ,vill_sub_id= village['id'],village['population'],village['subDistrictId']
-           
-            items= next(item for item in ans if item['subdistrict_code'] == vill_sub_id)
-           
-            output_year[village_id] = {
-                "2011": value,
-                str(target_year): int(value * math.exp(items['growth_rate']*t))
-            }
-        print(f"output year_g {output_year}")    
-        Air_last_output={}
-        Air_last_output['2011']=sum([values['2011'] for values in output_year.values()])
-        Air_last_output[target_year]=sum([values[str(target_year)] for values in output_year.values()])
-        print('Air_last_output_i',Air_last_output)
-    return Air_last_output
+    coefficients = subdistrict_coefficients(subdistrict)['Exponential']
+    return _population_years('Exponential', base_year, [int(single_year)], villages, coefficients)
 
 
 def Exponential_population_range(base_year, start_year, end_year, villages, subdistrict):
+    coefficients = subdistrict_coefficients(subdistrict)['Exponential']
+    return _population_years('Exponential', base_year, _range_years(start_year, end_year), villages, coefficients)
 
-    output_year = {}
-    ans = Exponential_d_values(subdistrict)
-    print("ans-g", ans)
-    base_year = int(base_year)
-    start_year = int(start_year)
-    end_year = int(end_year)
-
-    # Compute the population projections for each village separately
-    for village in villages:
-        village_id = village['id']
-        value = village['population']
-        vill_sub_id = village['subDistrictId']
-        items = next((item for item in ans if item['subdistrict_code'] == vill_sub_id), None)
-      
 
-        if items:
-            output_year[village_id] = {"2011": value}  # Store base population for 2011
-            for year in range(start_year, end_year + 1):
-                t = (year - base_year)
+def Demographic_population_single_year(base_year, single_year, villages, subdistrict, rates):
+    return _population_years('Demographic', base_year, [int(single_year)], villages, rates=rates)
 
-                projected_value = int(value * math.exp(items['growth_rate']*t))
-                output_year[village_id][year] = projected_value
 
-    print(f"Output years Range {output_year}")
-
-    # Now sum the populations across all villages to get the final output
-    Air_last_output = {"2011": sum(values["2011"] for values in output_year.values())}
-    for year in range(start_year, end_year + 1):
-        Air_last_output[year] = sum(values[year] for values in output_year.values())
-
-    print(f"Air_last_output {Air_last_output}")
-    return Air_last_output
-
-
-def Demographic_population_single_year(base_year,single_year,villages,subdistrict,annual_birth_rate,annual_death_rate,annual_emigration_rate,annual_immigration_rate):
-    output_year = {}
-    if single_year:
-        target_year = int(single_year)
-        base_year = int(base_year)
-        t = (target_year-base_year)
-        for village in villages: 
-            print("village", village)
-            village_id, value ,vill_sub_id= village['id'],village['population'],village['subDistrictId']
-            output_year[village_id] = {
-                "2011": value,
-                str(target_year): int( value + (value * t * (annual_birth_rate-annual_death_rate)) + (t * (annual_emigration_rate - annual_immigration_rate)))
-            }
-        print(f"output year {output_year}")
-        Air_last_output={}
-        Air_last_output['2011']=sum([values['2011'] for values in output_year.values()])
-        Air_last_output[target_year]=sum([values[str(target_year)] for values in output_year.values()])
-        print('Air_last_output_i',Air_last_output)
-    return Air_last_output
-
-
-def Demographic_population_range(base_year, start_year, end_year, villages, subdistrict, annual_birth_rate, annual_death_rate, annual_emigration_rate, annual_immigration_rate):
-    output_year = {}
-    base_year = int(base_year)
-    start_year = int(start_year)
-    end_year = int(end_year)
-
-    for village in villages:
-        village_id = village['id']
-        value = village['population']
-        output_year[village_id] = {"2011": value}  # Store base population for 2011
-        for year in range(start_year, end_year + 1):
-            t = (year - base_year)
-            value + (value * t * (annual_birth_rate-annual_death_rate)) + (t * (annual_emigration_rate - annual_immigration_rate))
-            projected_value = int(value + (value * t * (annual_birth_rate-annual_death_rate)) + (t * (annual_emigration_rate - annual_immigration_rate)))
-            output_year[village_id][year] = projected_value
-
-    Air_last_output = {"2011": sum(values["2011"] for values in output_year.values())}
-    for year in range(start_year, end_year + 1):
-        Air_last_output[year] = sum(values[year] for values in output_year.values())
-
-    return Air_last_output
\ No newline at end of file
+def Demographic_population_range(base_year, start_year, end_year, villages, subdistrict, rates):
+    return _population_years('Demographic', base_year, _range_years(start_year, end_year), villages, rates=rates)
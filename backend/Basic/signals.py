@@ -0,0 +1,19 @@
+from django.db.models.signals import post_save, post_delete
+from .models import Basic_state, Basic_district, Basic_subdistrict, Basic_village, SubdistrictGrowthCoefficient
+from .village_index import invalidate_village_index
+from .hierarchy import invalidate_location_hierarchy
+from .service import clear_coefficient_cache
+
+# Any change to the administrative tables invalidates the in-memory village index
+# and location hierarchy. Bulk loads (bulk_create / raw SQL) bypass signals and must
+# call invalidate_village_index() and invalidate_location_hierarchy().
+for model in (Basic_state, Basic_district, Basic_subdistrict, Basic_village):
+    post_save.connect(invalidate_village_index, sender=model, dispatch_uid=f"village_index_save_{model.__name__}")
+    post_delete.connect(invalidate_village_index, sender=model, dispatch_uid=f"village_index_delete_{model.__name__}")
+    post_save.connect(invalidate_location_hierarchy, sender=model, dispatch_uid=f"location_hierarchy_save_{model.__name__}")
+    post_delete.connect(invalidate_location_hierarchy, sender=model, dispatch_uid=f"location_hierarchy_delete_{model.__name__}")
+
+# Coefficient edits in this process drop the cached table at once; other processes
+# pick up the new table version within GROWTH_COEFFICIENT_CHECK_SECONDS.
+post_save.connect(clear_coefficient_cache, sender=SubdistrictGrowthCoefficient, dispatch_uid="growth_coefficients_save")
+post_delete.connect(clear_coefficient_cache, sender=SubdistrictGrowthCoefficient, dispatch_uid="growth_coefficients_delete")
@@ -1,3 +1,137 @@
-from django.test import TestCase
+import math
 
-# Create your tests here.
+import numpy as np
+from django.test import SimpleTestCase
+
+from Basic.models import PopulationCohort, PopulationCohortRollup
+from Basic.service import HISTORY_YEARS, TIME_SERIES_METHODS, growth_coefficients, project_arrays
+from main.testing import QueryPlanTestCase
+
+
+class HotQueryPlanTests(QueryPlanTestCase):
+    """EXPLAIN checks for the cohort filters behind CohortView and its rollups."""
+
+    @classmethod
+    def setUpTestData(cls):
+        PopulationCohort.objects.bulk_create([
+            PopulationCohort(
+                state_code=9, district_code=100 + v % 10, subdistrict_code=1000 + v % 100, village_code=v,
+                region_name=f"village {v}", year=year, age_group='0-4', gender='male', population=v,
+            )
+            for v in range(1000) for year in (2011, 2021, 2031)
+        ], batch_size=5000)
+        PopulationCohortRollup.objects.bulk_create([
+            PopulationCohortRollup(
+                level='district', state_code=9, district_code=district, year=year,
+                age_group='0-4', gender='male', population=district,
+            )
+            for district in range(100, 400) for year in range(2011, 2041)
+        ], batch_size=5000)
+        cls.analyze(PopulationCohort, PopulationCohortRollup)
+
+    def test_cohort_year_village(self):
+        self.assertNoSeqScan(PopulationCohort.objects.filter(year__in=[2011, 2021], village_code__in=[1, 2, 3]))
+
+    def test_cohort_year_subdistrict(self):
+        self.assertNoSeqScan(PopulationCohort.objects.filter(year__in=[2011, 2021], subdistrict_code__in=[1001, 1002]))
+
+    def test_cohort_year_district(self):
+        self.assertNoSeqScan(PopulationCohort.objects.filter(year=2021, district_code=101))
+
+    def test_cohort_rollup_level_year(self):
+        self.assertNoSeqScan(PopulationCohortRollup.objects.filter(level='district', year__in=[2011, 2021], district_code__in=[101]))
+
+
+# 1951-2011 census history per subdistrict: steady growth, a decline, a village-sized one
+HISTORY = {
+    101: [120000, 140000, 165000, 201000, 245000, 301000, 352000],
+    102: [80000, 78000, 83000, 79000, 91000, 97000, 95000],
+    103: [900, 1100, 1000, 1400, 1750, 2100, 2600],
+}
+# (village code, 2011 population, subdistrict)
+VILLAGES = [(1, 1520, 101), (2, 0, 101), (3, 8731, 101), (4, 403, 102), (5, 2999, 102), (6, 2600, 103)]
+YEARS = [2012, 2021, 2025, 2036, 2051]
+BASE_YEAR = 2011
+
+
+def baseline_coefficients(p):
+    # The per-subdistrict *_d_values formulas the vectorized engine replaced
+    p1, p2, p3, p4, p5, p6, p7 = p
+    d = [p2 - p1, p3 - p2, p4 - p3, p5 - p4, p6 - p5, p7 - p6]
+    growth = [g for g in ((d[i] * 100) / p[i] if p[i] else 0 for i in range(6)) if g > 0]
+    x = [year - BASE_YEAR for year in HISTORY_YEARS.tolist()]
+    y = [math.log(value, 10) for value in p]
+    n = 7
+    return {
+        'Arithmetic': {'annual_growth_rate': math.floor(((p7 - p1) / 6) / 10), 'total_p7': p7},
+        'Geometric': {'annual_growth_rate': round(math.pow(math.prod(growth), 1 / len(growth)) if growth else 0, 4), 'total_p7': p7},
+        'Incremental': {'d_mean': sum(d) / 6, 'm_mean': sum(d[i + 1] - d[i] for i in range(5)) / 5, 'total_p7': p7},
+        'Exponential': {
+            'growth_rate': ((n * sum(a * b for a, b in zip(x, y))) - sum(x) * sum(y)) / (n * sum(a ** 2 for a in x) - sum(x) ** 2),
+        },
+    }
+
+
+def baseline_projection(method, value, items, year):
+    # The per-village *_population_* loops, int() truncation included
+    t = year - BASE_YEAR
+    n = t / 10
+    if method == 'Arithmetic':
+        return int(value + ((items['annual_growth_rate'] * t) * (value / items['total_p7'])))
+    if method == 'Geometric':
+        return int(value * (math.pow((1 + (items['annual_growth_rate'] / 100)), n)))
+    if method == 'Incremental':
+        k = value / items['total_p7']
+        return int(value + k * n * items['d_mean'] + ((n * (n + 1)) * items['m_mean'] / 2) * k)
+    return int(value * math.exp(items['growth_rate'] * t))
+
+
+class ProjectionEngineTests(SimpleTestCase):
+    """Pins the vectorized projection engine to the per-village formulas it replaced."""
+
+    def setUp(self):
+        self.codes = np.array(sorted(HISTORY), dtype=np.int64)
+        self.history = np.array([HISTORY[code] for code in self.codes.tolist()], dtype=np.int64)
+        self.arrays = tuple(np.array(column, dtype=np.int64) for column in zip(*VILLAGES))
+
+    def test_coefficients_match_baseline(self):
+        coefficients = growth_coefficients(self.codes, self.history)
+        for row, code in enumerate(self.codes.tolist()):
+            for method, expected in baseline_coefficients(HISTORY[code]).items():
+                for field, value in expected.items():
+                    with self.subTest(subdistrict=code, method=method, field=field):
+                        self.assertAlmostEqual(float(coefficients[method][field][row]), value, places=9)
+
+    def test_projections_match_baseline(self):
+        coefficients = growth_coefficients(self.codes, self.history)
+        for method in TIME_SERIES_METHODS:
+            ids, populations, matrix = project_arrays(method, BASE_YEAR, YEARS, self.arrays, coefficients[method])
+            self.assertEqual(ids.tolist(), [code for code, _, _ in VILLAGES])
+            for (code, value, subdistrict), projected in zip(VILLAGES, matrix.tolist()):
+                items = baseline_coefficients(HISTORY[subdistrict])[method]
+                with self.subTest(method=method, village=code):
+                    self.assertEqual(projected, [baseline_projection(method, value, items, year) for year in YEARS])
+
+    def test_demographic_matches_baseline(self):
+        rates = {'birth_rate': 0.02, 'death_rate': 0.007, 'emigration_rate': 0.001, 'immigration_rate': 0.003}
+        _, _, matrix = project_arrays('Demographic', BASE_YEAR, YEARS, self.arrays, rates=rates)
+        for (code, value, _), projected in zip(VILLAGES, matrix.tolist()):
+            expected = [
+                int(value + (value * (year - BASE_YEAR) * (rates['birth_rate'] - rates['death_rate']))
+                    + ((year - BASE_YEAR) * (rates['emigration_rate'] - rates['immigration_rate'])))
+                for year in YEARS
+            ]
+            self.assertEqual(projected, expected)
+
+    def test_undefined_coefficients_are_skipped(self):
+        # A zero census count makes the exponential fit and the p / total_p7 share undefined
+        codes = np.array([101, 104], dtype=np.int64)
+        history = np.array([HISTORY[101], [0, 0, 10, 20, 30, 40, 0]], dtype=np.int64)
+        coefficients = growth_coefficients(codes, history)
+        arrays = (np.array([1, 7], dtype=np.int64), np.array([1520, 0], dtype=np.int64), codes)
+        with self.assertLogs('Basic.service', level='WARNING'):
+            for method in TIME_SERIES_METHODS:
+                with self.subTest(method=method):
+                    ids, _, matrix = project_arrays(method, BASE_YEAR, YEARS, arrays, coefficients[method])
+                    self.assertEqual(ids.tolist(), [1])
+                    self.assertTrue((matrix > 0).all())
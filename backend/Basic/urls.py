@@ -1,12 +1,14 @@
 from django.urls import path
-from .views import VillagePopulationRawSQL, VillagePopulationAPI,MultipleVillagesAPI, VillagesCatchmentIntersection, AllStretches, Catchments, BasinAPI, RiverMapAPI, RiverStretched, Drain, CohortView, DefaultBaseMapAPI, StateShapefileAPI, MultipleDistrictsAPI,MultipleSubdistrictsAPI, Locations_stateAPI,Locations_districtAPI,Locations_subdistrictAPI,Locations_villageAPI,Time_series,Demographic,SewageCalculation,WaterSupplyCalculationAPI,DomesticWaterDemandCalculationAPIView,FloatingWaterDemandCalculationAPIView,InstitutionalWaterDemandCalculationAPIView,FirefightingWaterDemandCalculationAPIView
+from .views import VillagePopulationRawSQL, VillagePopulationAPI,MultipleVillagesAPI, VillagesCatchmentIntersection, AllStretches, Catchments, BasinAPI, RiverMapAPI, RiverStretched, Drain, CohortView, DefaultBaseMapAPI, StateShapefileAPI, MultipleDistrictsAPI,MultipleSubdistrictsAPI, Locations_stateAPI,Locations_districtAPI,Locations_subdistrictAPI,Locations_villageAPI,Time_series,Demographic,Forecast_batch_API,SewageCalculation,WaterSupplyCalculationAPI,DomesticWaterDemandCalculationAPIView,FloatingWaterDemandCalculationAPIView,InstitutionalWaterDemandCalculationAPIView,FirefightingWaterDemandCalculationAPIView,WaterDemandPipelineAPIView,DiurnalProfileAPIView,HierarchySnapshotAPI
 urlpatterns = [
     path("state",Locations_stateAPI.as_view(),name="states"),
     path("district",Locations_districtAPI.as_view(),name="districts"),
     path("subdistrict",Locations_subdistrictAPI.as_view(),name="subdistricts"),
     path("village",Locations_villageAPI.as_view(),name="villages"),
+    path("hierarchy_snapshot",HierarchySnapshotAPI.as_view(),name="hierarchy_snapshot"),
     path("time_series/arthemitic",Time_series.as_view(),name="time_series"),
     path("time_series/demographic",Demographic.as_view(),name="demographic"),
+    path("time_series/batch",Forecast_batch_API.as_view(),name="time_series_batch"),
     path("sewage_calculation",SewageCalculation.as_view(), name="sewage_calculation"),
     path("sewage_calculation/total_population",SewageCalculation.as_view(), name="total_population"),
     path("water_supply", WaterSupplyCalculationAPI.as_view(), name="water_supply"),
@@ -14,6 +16,8 @@ urlpatterns = [
     path('floating_water_demand', FloatingWaterDemandCalculationAPIView.as_view(), name='floating_water_demand'),
     path('institutional_water_demand', InstitutionalWaterDemandCalculationAPIView.as_view(), name='institutional_water_demand'),
     path('firefighting_water_demand', FirefightingWaterDemandCalculationAPIView.as_view(), name='firefighting_water_demand'),
+    path('water_demand_pipeline', WaterDemandPipelineAPIView.as_view(), name='water_demand_pipeline'),
+    path('diurnal_profile', DiurnalProfileAPIView.as_view(), name='diurnal_profile'),
     path('cohort', CohortView.as_view(), name='cohort'),
     path('basemap', DefaultBaseMapAPI.as_view(), name='default-base-map'),
     path('state-shapefile', StateShapefileAPI.as_view(), name='state-shapefile'),
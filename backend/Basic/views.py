@@ -1,19 +1,33 @@
-from Basic.models import Basic_state, Basic_district, Basic_subdistrict, Basic_village, Population_2011
-from Basic.serializers import StateSerializer, DistrictSerializer, SubDistrictSerializer, VillageSerializer
-from django.http import Http404
+from Basic.models import Basic_district, Basic_subdistrict, Basic_village
+from django.utils.http import parse_etags
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-import math
 from .service import *
-from django.db.models import Sum, Q
-from .models import PopulationCohort
-from django.http import JsonResponse
+from .village_index import correct_village_subdistricts, village_codes, normalise_village_code
+from .boundary_layers import load_layer, indexed_layer, read_layer
+from .hierarchy import get_location_hierarchy, parent_codes, compressed_hierarchy_snapshot
+from .forecast_cube import cube_population_selection
+from .forecast_batch import Forecast_batch
+from .cohort_engine import Cohort_projection, COHORT_BASE_YEAR
+from .cohort_rollup import cohort_rollup_level
+from .water_demand import (
+    water_demand_pipeline, forecast_arrays, growth_ratios, institutional_base_demand, institutional_demand_batch,
+    demand_sweep, sewage_sweep, DOMESTIC_SEWAGE_FACTOR, SUPPLY_SEWAGE_FACTOR,
+    domestic_demand, floating_demand, firefighting_demand, sewage_generation,
+    diurnal_curve, peak_factors, peak_profiles, step_labels,
+)
+from django.db.models import Sum, Q, Count
+from .models import PopulationCohort, PopulationCohortRollup
+from django.http import StreamingHttpResponse, HttpResponse
+import gzip
+import numpy as np
 import os
 import json
 import geopandas as gpd
 import pandas as pd 
 from django.conf import settings
+from django.db import connection
 import traceback
 import logging
 from rest_framework.permissions import AllowAny 
@@ -21,38 +35,102 @@ from rest_framework.permissions import AllowAny
 logger = logging.getLogger(__name__)
 
 
+def hierarchy_response(request, level, parents=None):
+    """
+    Location rows from the cached hierarchy with a strong ETag. GET/HEAD requests
+    whose If-None-Match already holds it get 304 Not Modified without a body.
+    """
+    hierarchy = get_location_hierarchy()
+    etag = hierarchy.etag(level, parents)
+    if request.method in ('GET', 'HEAD') and etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(hierarchy.children(level, parents), status=status.HTTP_200_OK)
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def location_parents(request, field):
+    # POST bodies carry one code or a list; GET takes ?field=1&field=2 or ?field=1,2
+    if request.method == 'POST':
+        return parent_codes(request.data[field])
+    values = [value for param in request.query_params.getlist(field) for value in param.split(',') if value]
+    if not values:
+        raise KeyError(field)
+    return parent_codes(values)
+
+
 class Locations_stateAPI(APIView):
     permission_classes = [AllowAny] 
     def get(self, request, format=None):
-        states = Basic_state.objects.all()
-        serial = StateSerializer(states, many=True)
-        sorted_data = sorted(serial.data, key=lambda x: x['state_name'])
-        return Response(sorted_data, status=status.HTTP_200_OK)
+        return hierarchy_response(request, 'state')
     
 class Locations_districtAPI(APIView):
     permission_classes = [AllowAny] 
+    def get(self, request, format=None):
+        return self.post(request, format)
+
     def post(self, request, format=None):
-        district = Basic_district.objects.all().filter(state_code=request.data['state_code'])
-        serial = DistrictSerializer(district, many=True)
-        sorted_data = sorted(serial.data, key=lambda x: x['district_name'])
-        return Response(sorted_data, status=status.HTTP_200_OK)
+        try:
+            state_codes = location_parents(request, 'state_code')
+        except KeyError:
+            return Response({"error": "state_code is required"}, status=status.HTTP_400_BAD_REQUEST)
+        return hierarchy_response(request, 'district', state_codes)
     
 class Locations_subdistrictAPI(APIView):
     permission_classes = [AllowAny] 
+    def get(self, request, format=None):
+        return self.post(request, format)
+
     def post(self, request, format=None):
-        print(request.data['district_code'])
-        subdistrict = Basic_subdistrict.objects.all().filter(district_code__in=request.data['district_code'])
-        serial = SubDistrictSerializer(subdistrict, many=True)
-        sorted_data = sorted(serial.data, key=lambda x: x['subdistrict_name'])
-        return Response(sorted_data, status=status.HTTP_200_OK)
+        try:
+            district_codes = location_parents(request, 'district_code')
+        except KeyError:
+            return Response({"error": "district_code is required"}, status=status.HTTP_400_BAD_REQUEST)
+        return hierarchy_response(request, 'subdistrict', district_codes)
 
 class Locations_villageAPI(APIView):
     permission_classes = [AllowAny]  
+    def get(self, request, format=None):
+        return self.post(request, format)
+
     def post(self, request, format=None):
-        village = Basic_village.objects.all().filter(subdistrict_code__in=request.data['subdistrict_code'])
-        serial = VillageSerializer(village, many=True)
-        sorted_data = sorted(serial.data, key=lambda x: x['village_name'])
-        return Response(sorted_data, status=status.HTTP_200_OK)
+        try:
+            subdistrict_codes = location_parents(request, 'subdistrict_code')
+        except KeyError:
+            return Response({"error": "subdistrict_code is required"}, status=status.HTTP_400_BAD_REQUEST)
+        return hierarchy_response(request, 'village', subdistrict_codes)
+
+class HierarchySnapshotAPI(APIView):
+    """
+    The full state -> district -> subdistrict -> village tree in one gzipped JSON
+    payload of per-level columns with parent-index arrays (see hierarchy_snapshot).
+    Optional ?state_code=9 (or 9,10) limits it to those states.
+    """
+    permission_classes = [AllowAny]
+    def get(self, request, format=None):
+        state_codes = None
+        values = [value for param in request.query_params.getlist('state_code') for value in param.split(',') if value]
+        if values:
+            state_codes = parent_codes(values)
+
+        etag, data = compressed_hierarchy_snapshot(state_codes)
+        # Strong ETags differ per content coding
+        compressed = 'gzip' in request.headers.get('Accept-Encoding', '')
+        if compressed:
+            etag = etag[:-1] + '-gzip"'
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        elif compressed:
+            response = HttpResponse(data, content_type='application/json')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(gzip.decompress(data), content_type='application/json')
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'
+        response['Vary'] = 'Accept-Encoding'
+        return response
 
 class Demographic(APIView):
     permission_classes = [AllowAny] 
@@ -61,44 +139,75 @@ class Demographic(APIView):
         base_year = 2011
         # Get data from request
         print('request_data is ',request.data)
-        single_year = request.data['year']
-        start_year = request.data['start_year']
-        end_year = request.data['end_year']
-        villages = request.data['villages_props']
-        subdistrict = request.data['subdistrict_props']
-        total_population = request.data['totalPopulation_props']
-        demographic = request.data['demographic']
+        single_year = request.data.get('year')
+        start_year = request.data.get('start_year')
+        end_year = request.data.get('end_year')
+        selection = request.data.get('selection')
+        group_by = request.data.get('group_by')
+        demographic = request.data.get('demographic')
+
+        if group_by and group_by not in GROUP_LEVELS:
+            return Response({"error": f"group_by must be one of {', '.join(GROUP_LEVELS)}"}, status=status.HTTP_400_BAD_REQUEST)
+        if group_by and request.data.get('sweep'):
+            return Response({"error": "sweep cannot be combined with group_by"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            years = forecast_years(single_year, start_year, end_year)
+        except (TypeError, ValueError):
+            return Response({"error": "year, start_year and end_year must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Sweep mode: each rate may be a list or {start, stop, step}; the whole grid is projected at once
+        if request.data.get('sweep'):
+            if selection:
+                arrays = selection_arrays(selection)
+            else:
+                villages = request.data['villages_props']
+                correct_village_subdistricts(villages)
+                arrays = village_arrays(villages)
+            try:
+                main_output = Demographic_population_sweep(base_year, years, arrays, demographic['birthRate'], demographic['deathRate'], demographic['emigrationRate'], demographic['immigrationRate'])
+            except (ValueError, TypeError, KeyError) as e:
+                return Response({"error": f"Invalid sweep: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(main_output, status=status.HTTP_200_OK)
 
         print(f"demographic {demographic}")
-        annual_birth_rate = demographic['birthRate']
-        annual_death_rate = demographic['deathRate']
-        annual_emigration_rate = demographic['emigrationRate']
-        annual_immigration_rate = demographic['immigrationRate']
+        try:
+            rates = demographic_rates(demographic)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        annual_birth_rate = annual_birth_rate/10000
-        annual_death_rate = annual_death_rate/10000
-        annual_emigration_rate = annual_emigration_rate/10000
-        annual_immigration_rate = annual_immigration_rate/10000
-        
+        main_output={}
+
+        # Compact selection: village / subdistrict / district codes resolved server-side
+        if selection:
+            if years and group_by:
+                main_output = Demographic_population_groups(base_year, years, selection_arrays(selection), rates, group_by)
+            elif years:
+                # Precomputed cube when it holds these years and rates, live projection otherwise
+                cached = cube_population_selection(('Demographic',), base_year, years, selection, rates)
+                if cached:
+                    main_output['demographic'] = cached['Demographic']
+                else:
+                    main_output['demographic'] = Demographic_population_selection(base_year, years, selection, rates)
+            return Response(main_output, status=status.HTTP_200_OK)
+
+        villages = request.data['villages_props']
+        subdistrict = request.data['subdistrict_props']
 
         # Correcting the subdistrict_id of the villages coming from frontend 
-        # Fetch all villages from the database
-        village_data = Basic_village.objects.values('village_code', 'subdistrict_code')
-        # Create a mapping of village_code to subdistrict_code
-        village_mapping = {v['village_code']: v['subdistrict_code'] for v in village_data}
-        # Update the villages list with the correct subDistrictId
-        for village in villages:
-            village_code = village['id']
-            if village_code in village_mapping:
-                village['subDistrictId'] = village_mapping[village_code]
+        # using the in-memory village index instead of scanning Basic_village
+        correct_village_subdistricts(villages)
 
-        main_output={}
+        # Per-village / subdistrict / district columns instead of one total
+        if group_by:
+            if years:
+                main_output = Demographic_population_groups(base_year, years, village_arrays(villages), rates, group_by)
+            return Response(main_output, status=status.HTTP_200_OK)
 
         if single_year:
-            main_output['demographic'] = Demographic_population_single_year(base_year,single_year,villages,subdistrict,annual_birth_rate,annual_death_rate,annual_emigration_rate,annual_immigration_rate)  
+            main_output['demographic'] = Demographic_population_single_year(base_year, single_year, villages, subdistrict, rates)
               
         elif start_year and end_year:
-            main_output['demographic'] = Demographic_population_range(base_year, start_year, end_year, villages, subdistrict, annual_birth_rate, annual_death_rate, annual_emigration_rate, annual_immigration_rate) 
+            main_output['demographic'] = Demographic_population_range(base_year, start_year, end_year, villages, subdistrict, rates)
         print("output",main_output)
         return Response(main_output, status=status.HTTP_200_OK)    
 
@@ -108,45 +217,107 @@ class Time_series(APIView):
         base_year = 2011
         # Get data from request
         print('request_data is ',request.data)
-        single_year = request.data['year']
-        start_year = request.data['start_year']
-        end_year = request.data['end_year']
+        single_year = request.data.get('year')
+        start_year = request.data.get('start_year')
+        end_year = request.data.get('end_year')
+        selection = request.data.get('selection')
+        group_by = request.data.get('group_by')
+        # true or {"draws", "seed", "percentiles"}: adds percentile bands next to the deterministic lines
+        try:
+            monte_carlo = monte_carlo_options(request.data.get('monte_carlo'))
+        except ValueError as e:
+            return Response({"error": f"Invalid monte_carlo: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if group_by and group_by not in GROUP_LEVELS:
+            return Response({"error": f"group_by must be one of {', '.join(GROUP_LEVELS)}"}, status=status.HTTP_400_BAD_REQUEST)
+        if group_by and monte_carlo is not None:
+            return Response({"error": "monte_carlo cannot be combined with group_by"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            years = forecast_years(single_year, start_year, end_year)
+        except (TypeError, ValueError):
+            return Response({"error": "year, start_year and end_year must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Compact selection: village / subdistrict / district codes resolved server-side
+        if selection:
+            main_output = {}
+            if years and group_by:
+                arrays = selection_arrays(selection)
+                main_output = Time_series_population_groups(base_year, years, arrays, coefficients_for_codes(arrays[2]), group_by)
+            elif years:
+                # Precomputed cube when it holds these years, live projection otherwise
+                main_output.update(cube_population_selection(TIME_SERIES_METHODS, base_year, years, selection) or Time_series_population_selection(base_year, years, selection))
+                if monte_carlo is not None:
+                    try:
+                        main_output['monte_carlo'] = Monte_carlo_population_bands(base_year, years, selection_arrays(selection), **monte_carlo)
+                    except (ValueError, TypeError) as e:
+                        return Response({"error": f"Invalid monte_carlo: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(main_output, status=status.HTTP_200_OK)
+
         villages = request.data['villages_props']
         subdistrict = request.data['subdistrict_props']
-        total_population = request.data['totalPopulation_props']
-        
 
         # Correcting the subdistrict_id of the villages coming from frontend 
-        # Fetch all villages from the database
-        village_data = Basic_village.objects.values('village_code', 'subdistrict_code')
-        # Create a mapping of village_code to subdistrict_code
-        village_mapping = {v['village_code']: v['subdistrict_code'] for v in village_data}
-        # Update the villages list with the correct subDistrictId
-        for village in villages:
-            village_code = village['id']
-            if village_code in village_mapping:
-                village['subDistrictId'] = village_mapping[village_code]
-
-
+        # using the in-memory village index instead of scanning Basic_village
+        correct_village_subdistricts(villages)
 
+        # Per-village / subdistrict / district columns instead of one total per method
+        if group_by:
+            main_output = {}
+            if years:
+                main_output = Time_series_population_groups(base_year, years, village_arrays(villages), subdistrict_coefficients(subdistrict), group_by)
+            return Response(main_output, status=status.HTTP_200_OK)
 
+        # Census history is fetched once and shared by all four methods
         main_output={}
         if single_year:
-            main_output['Arithmetic']=Arithmetic_population_single_year(base_year,single_year,villages,subdistrict)
-            main_output['Geometric']=Geometric_population_single_year(base_year,single_year,villages,subdistrict)
-            main_output['Incremental']=Incremental_population_single_year(base_year,single_year,villages,subdistrict)
-            main_output['Exponential']=Exponential_population_single_year(base_year,single_year,villages,subdistrict)
+            main_output.update(Time_series_population_single_year(base_year,single_year,villages,subdistrict))
 
         elif start_year and end_year:
-            main_output['Arithmetic']=Arithmetic_population_range(base_year,start_year,end_year,villages,subdistrict)  
-            main_output['Geometric']=Geometric_population_range(base_year,start_year,end_year,villages,subdistrict)
-            main_output['Incremental']=Incremental_population_range(base_year,start_year,end_year,villages,subdistrict)
-            main_output['Exponential']=Exponential_population_range(base_year,start_year,end_year,villages,subdistrict)
+            main_output.update(Time_series_population_range(base_year,start_year,end_year,villages,subdistrict))
         else:
             pass
+
+        if monte_carlo is not None and years:
+            try:
+                main_output['monte_carlo'] = Monte_carlo_population_bands(base_year, years, village_arrays(villages), **monte_carlo)
+            except (ValueError, TypeError) as e:
+                return Response({"error": f"Invalid monte_carlo: {e}"}, status=status.HTTP_400_BAD_REQUEST)
         print("output",main_output)
         return Response(main_output, status=status.HTTP_200_OK)
 
+class Forecast_batch_API(APIView):
+    """
+    Many named selections in one request:
+    {"selections": {name: {"village_codes": [...], "subdistrict_codes": [...], "district_codes": [...]}},
+     "methods": ["Arithmetic", ..., "Demographic"], "year" | "start_year" + "end_year",
+     "demographic": {"birthRate", "deathRate", "emigrationRate", "immigrationRate"}}
+    """
+    permission_classes = [AllowAny]
+    def post(self, request, format=None):
+        base_year = 2011
+        selections = request.data.get('selections') or {}
+        methods = request.data.get('methods') or list(TIME_SERIES_METHODS)
+        try:
+            years = forecast_years(request.data.get('year'), request.data.get('start_year'), request.data.get('end_year'))
+        except (TypeError, ValueError):
+            return Response({"error": "year, start_year and end_year must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(selections, dict) or not years:
+            return Response({"error": "selections (name -> selection) and year or start_year/end_year are required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        rates = None
+        demographic = request.data.get('demographic')
+        if demographic:
+            try:
+                rates = demographic_rates(demographic)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            output = Forecast_batch(base_year, years, selections, methods, rates)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(output, status=status.HTTP_200_OK)
+
 class SewageCalculation(APIView):
     permission_classes = [AllowAny] 
     def post(self, request, format=None):
@@ -158,7 +329,7 @@ class SewageCalculation(APIView):
                 return Response({"error": "Invalid total supply"}, status=status.HTTP_400_BAD_REQUEST)
             if total_supply <= 0:
                 return Response({"error": "Total supply must be greater than zero"}, status=status.HTTP_400_BAD_REQUEST)
-            sewage_demand = total_supply * 0.84  # example formula
+            sewage_demand = total_supply * SUPPLY_SEWAGE_FACTOR
             return Response({"sewage_demand": sewage_demand}, status=status.HTTP_200_OK)
         elif method == 'domestic_sewage':
             load_method = request.data.get('load_method')
@@ -169,7 +340,7 @@ class SewageCalculation(APIView):
                     return Response({"error": "Invalid domestic supply"}, status=status.HTTP_400_BAD_REQUEST)
                 if domestic_supply <= 0:
                     return Response({"error": "Domestic supply must be greater than zero"}, status=status.HTTP_400_BAD_REQUEST)
-                sewage_demand = domestic_supply * 0.84  # example formula
+                sewage_demand = domestic_supply * SUPPLY_SEWAGE_FACTOR
                 return Response({"sewage_demand": sewage_demand}, status=status.HTTP_200_OK)
             elif load_method == 'modeled':
                 computed_population = request.data.get('computed_population')
@@ -179,18 +350,29 @@ class SewageCalculation(APIView):
                     unmetered = 0
                 if not computed_population:
                     return Response({"error": "Computed population data not provided."}, status=status.HTTP_400_BAD_REQUEST)
-                result = {}
-                for year, pop in computed_population.items():
-                    try:
-                        pop_val = float(pop)
-                    except (TypeError, ValueError):
-                        continue
-                    multiplier = (135 + unmetered) / 1000000
-                    sewage_gen = pop_val * multiplier * 0.80  # example formula
-                    result[year] = sewage_gen
+                if not isinstance(computed_population, dict):
+                    return Response({"error": "computed_population must be an object of year: population."}, status=status.HTTP_400_BAD_REQUEST)
+                years, populations = forecast_arrays(computed_population)
+                result = dict(zip(years, sewage_generation(populations, unmetered).tolist()))
                 return Response({"sewage_result": result}, status=status.HTTP_200_OK)
             else:
                 return Response({"error": "Invalid domestic load method"}, status=status.HTTP_400_BAD_REQUEST)
+        elif method == 'sweep':
+            # unmetered_supply / sewage_factor / supply_sewage_factor: number | list | {start, stop, step}
+            computed_population = request.data.get('computed_population')
+            if not computed_population:
+                return Response({"error": "Computed population data not provided."}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                result = sewage_sweep(
+                    computed_population,
+                    request.data.get('unmetered_supply', 0),
+                    sewage_factor=request.data.get('sewage_factor', DOMESTIC_SEWAGE_FACTOR),
+                    total_supply=request.data.get('total_supply'),
+                    supply_sewage_factor=request.data.get('supply_sewage_factor', SUPPLY_SEWAGE_FACTOR),
+                )
+            except (TypeError, ValueError, KeyError) as e:
+                return Response({"error": f"Invalid sweep: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(result, status=status.HTTP_200_OK)
         else:
             return Response({"error": "Invalid sewage method"}, status=status.HTTP_400_BAD_REQUEST)
         
@@ -266,6 +448,30 @@ class DomesticWaterDemandCalculationAPIView(APIView):
     def post(self, request, format=None):
         forecast_data = request.data.get("forecast_data")
         per_capita_consumption = request.data.get("per_capita_consumption")
+
+        # Sweep mode: {"per_capita_consumption": number | list | {start, stop, step},
+        #              "facility_types": [...], "floating_population": n, "target_supply": MLD, "target_year": y}
+        # or "sweep": true with those parameters at the top level, like the Demographic sweep
+        sweep = request.data.get("sweep")
+        if sweep:
+            if sweep is True:
+                sweep = request.data
+            elif not isinstance(sweep, dict):
+                return Response({"error": "sweep must be true or an object of sweep parameters."}, status=status.HTTP_400_BAD_REQUEST)
+            if forecast_data is None:
+                return Response({"error": "'forecast_data' must be provided."}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                result = demand_sweep(
+                    forecast_data,
+                    sweep.get("per_capita_consumption", per_capita_consumption or 0),
+                    facility_types=sweep.get("facility_types"),
+                    floating_population=sweep.get("floating_population"),
+                    target_supply=sweep.get("target_supply"),
+                    target_year=sweep.get("target_year"),
+                )
+            except (TypeError, ValueError, KeyError, AttributeError) as e:
+                return Response({"error": f"Invalid sweep: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(result, status=status.HTTP_200_OK)
         
         if forecast_data is None or per_capita_consumption is None:
             return Response(
@@ -273,6 +479,9 @@ class DomesticWaterDemandCalculationAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        if not isinstance(forecast_data, dict):
+            return Response({"error": "forecast_data must be an object of year: population."}, status=status.HTTP_400_BAD_REQUEST)
+        
         try:
             per_capita = float(per_capita_consumption)
         except (ValueError, TypeError):
@@ -281,16 +490,9 @@ class DomesticWaterDemandCalculationAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Calculate the effective per capita consumption
-        effective_consumption = 135 + per_capita
-        
-        result = {}
-        for year, population in forecast_data.items():
-            try:
-                pop = float(population)
-            except (ValueError, TypeError):
-                continue
-            result[year] = pop * (effective_consumption / 1000000)
+        # Base consumption and the formula live in water_demand.domestic_demand
+        years, populations = forecast_arrays(forecast_data)
+        result = dict(zip(years, domestic_demand(populations, per_capita).tolist()))
         
         return Response(result, status=status.HTTP_200_OK)
     
@@ -339,7 +541,7 @@ class FloatingWaterDemandCalculationAPIView(APIView):
         except (TypeError, ValueError):
             return Response({"error": "Invalid floating_population value."}, status=status.HTTP_400_BAD_REQUEST)
         
-        if "2011" not in domestic_forecast:
+        if not isinstance(domestic_forecast, dict) or "2011" not in domestic_forecast:
             return Response({"error": "domestic_forecast must include a value for 2011."}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
@@ -347,31 +549,13 @@ class FloatingWaterDemandCalculationAPIView(APIView):
         except (TypeError, ValueError):
             return Response({"error": "Invalid domestic_forecast value for 2011."}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Determine facility multiplier
-        if facility_type == "provided":
-            facility_multiplier = 45
-        elif facility_type == "notprovided":
-            facility_multiplier = 25
-        elif facility_type == "onlypublic":
-            facility_multiplier = 15
-        else:
-            return Response(
-                {"error": "Invalid facility_type. Must be 'provided', 'notprovided', or 'onlypublic'."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        result = {}
-        # For each year in the domestic forecast, calculate the projected floating demand.
-        for year, dom_value in domestic_forecast.items():
-            try:
-                dom_value = float(dom_value)
-            except (TypeError, ValueError):
-                continue
-            # Calculate growth ratio relative to 2011
-            growth_ratio = dom_value / base_population if base_population != 0 else 1
-            projected_floating_population = floating_population * growth_ratio
-            demand = projected_floating_population * (facility_multiplier / 1000000)
-            result[year] = demand
+        # Facility multipliers live in water_demand.FLOATING_FACILITY_MULTIPLIERS
+        years, populations = forecast_arrays(domestic_forecast)
+        try:
+            demand = floating_demand(populations, base_population, floating_population, facility_type)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        result = dict(zip(years, demand.tolist()))
         
         return Response(result, status=status.HTTP_200_OK)
 
@@ -451,6 +635,10 @@ class InstitutionalWaterDemandCalculationAPIView(APIView):
       For each year:
         growth_ratio = domestic_forecast[year] / domestic_forecast["2011"]
         institutional_demand[year] = base_demand * growth_ratio
+
+    Batch mode: with "batch": true, institutional_fields may be a list or a
+    {name: fields} dict of inventories (e.g. one per ward or village). The
+    response is {"names": [...], "years": [...], "values": name x year}.
     """
     def post(self, request, format=None):
         data = request.data
@@ -463,7 +651,7 @@ class InstitutionalWaterDemandCalculationAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        if "2011" not in domestic_forecast:
+        if not isinstance(domestic_forecast, dict) or "2011" not in domestic_forecast:
             return Response(
                 {"error": "domestic_forecast must include a value for 2011."},
                 status=status.HTTP_400_BAD_REQUEST
@@ -474,42 +662,28 @@ class InstitutionalWaterDemandCalculationAPIView(APIView):
         except (TypeError, ValueError):
             return Response({"error": "Invalid domestic_forecast value for 2011."}, status=status.HTTP_400_BAD_REQUEST)
         
+        # Batch mode: one institutional_fields dict per ward / village, evaluated as one matrix product
+        if isinstance(inst_fields, (list, dict)) and data.get("batch"):
+            names = list(inst_fields) if isinstance(inst_fields, dict) else list(range(len(inst_fields)))
+            inventories = list(inst_fields.values()) if isinstance(inst_fields, dict) else inst_fields
+            try:
+                years, populations = forecast_arrays(domestic_forecast)
+                demand = institutional_demand_batch(populations, base_domestic, inventories)
+            except (TypeError, ValueError, AttributeError) as e:
+                return Response({"error": "Error parsing institutional field values: " + str(e)},
+                                status=status.HTTP_400_BAD_REQUEST)
+            return Response({"names": names, "years": years, "values": demand.tolist()}, status=status.HTTP_200_OK)
+
         try:
-            term1 = float(inst_fields.get("hospitals100Units", 0)) * float(inst_fields.get("beds100", 0)) * 450
-            term2 = float(inst_fields.get("hospitalsLess100", 0)) * float(inst_fields.get("bedsLess100", 0)) * 350
-            term3 = float(inst_fields.get("hotels", 0)) * float(inst_fields.get("bedsHotels", 0)) * 180
-            term4 = float(inst_fields.get("hostels", 0)) * float(inst_fields.get("residentsHostels", 0)) * 135
-            term5 = float(inst_fields.get("nursesHome", 0)) * float(inst_fields.get("residentsNursesHome", 0)) * 135
-            term6 = float(inst_fields.get("boardingSchools", 0)) * float(inst_fields.get("studentsBoardingSchools", 0)) * 135
-            term7 = float(inst_fields.get("restaurants", 0)) * float(inst_fields.get("seatsRestaurants", 0)) * 70
-            term8 = float(inst_fields.get("airportsSeaports", 0)) * float(inst_fields.get("populationLoadAirports", 0)) * 70
-            term9 = float(inst_fields.get("junctionStations", 0)) * float(inst_fields.get("populationLoadJunction", 0)) * 70
-            term10 = float(inst_fields.get("terminalStations", 0)) * float(inst_fields.get("populationLoadTerminal", 0)) * 45
-            term11 = float(inst_fields.get("intermediateBathing", 0)) * float(inst_fields.get("populationLoadBathing", 0)) * 45
-            term12 = float(inst_fields.get("intermediateNoBathing", 0)) * float(inst_fields.get("populationLoadNoBathing", 0)) * 25
-            term13 = float(inst_fields.get("daySchools", 0)) * float(inst_fields.get("studentsDaySchools", 0)) * 45
-            term14 = float(inst_fields.get("offices", 0)) * float(inst_fields.get("employeesOffices", 0)) * 45
-            term15 = float(inst_fields.get("factorieswashrooms", 0)) * float(inst_fields.get("employeesFactories", 0)) * 45
-            term16 = float(inst_fields.get("factoriesnoWashrooms", 0)) * float(inst_fields.get("employeesFactoriesNoWashrooms", 0)) * 30
-            term17 = float(inst_fields.get("cinemas", 0)) * float(inst_fields.get("populationLoadCinemas", 0)) * 15
-
-            base_demand = (
-                term1 + term2 + term3 + term4 + term5 + term6 + term7 +
-                term8 + term9 + term10 + term11 + term12 + term13 +
-                term14 + term15 + term16 + term17
-            ) / 1000000.0
+            # Coefficients live in water_demand.INSTITUTIONAL_TERMS; the demand is their dot product
+            base_demand = institutional_base_demand(inst_fields)
+            years, populations = forecast_arrays(domestic_forecast)
         except Exception as e:
             return Response({"error": "Error parsing institutional field values: " + str(e)},
                             status=status.HTTP_400_BAD_REQUEST)
         
-        result = {}
-        for year, value in domestic_forecast.items():
-            try:
-                year_value = float(value)
-            except (TypeError, ValueError):
-                continue
-            growth_ratio = year_value / base_domestic if base_domestic != 0 else 1
-            result[year] = base_demand * growth_ratio
+        demand = base_demand * growth_ratios(populations, base_domestic)
+        result = dict(zip(years, demand.tolist()))
         
         return Response(result, status=status.HTTP_200_OK)
 
@@ -565,41 +739,139 @@ class FirefightingWaterDemandCalculationAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        if "2011" not in domestic_forecast:
+        if not isinstance(methods, dict):
+            return Response({"error": "firefighting_methods must be an object of method: true/false."}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not isinstance(domestic_forecast, dict) or "2011" not in domestic_forecast:
             return Response(
                 {"error": "domestic_forecast must include a value for 2011."},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # We don't use a growth ratio here; each year's forecasted population (popVal) is used directly.
-        result = {}
-        for method, selected in methods.items():
-            if selected:
-                method_result = {}
-                for year, value in domestic_forecast.items():
-                    try:
-                        popVal = float(value)
-                    except (TypeError, ValueError):
-                        continue
-                    if method == "kuchling":
-                        demand = (4.582 / 100) * math.sqrt(popVal / 1000)
-                    elif method == "freeman":
-                        demand = (1.635 / 100) * ((popVal / 5000) + 10)
-                    elif method == "buston":
-                        demand = (8.155 / 100) * math.sqrt(popVal / 1000)
-                    elif method == "american_insurance":
-                        demand = (6.677 / 100) * math.sqrt(popVal / 1000) * (1 - 0.01 * math.sqrt(popVal / 1000))
-                    elif method == "ministry_urban":
-                        demand = math.sqrt(popVal) / 1000
-                    else:
-                        demand = 0.0
-                    method_result[year] = demand
-                result[method] = method_result
+        # We don't use a growth ratio here; each year's forecasted population is used directly.
+        # The formulas live in water_demand.FIREFIGHTING_FORMULAS
+        years, populations = forecast_arrays(domestic_forecast)
+        result = {
+            method: dict(zip(years, demand.tolist()))
+            for method, demand in firefighting_demand(populations, methods).items()
+        }
         
         return Response(result, status=status.HTTP_200_OK)
 
 
+class WaterDemandPipelineAPIView(APIView):
+    permission_classes = [AllowAny]
+    """
+    All water demand components for one forecast in a single request.
+
+    Expected JSON payload (every component is optional):
+    {
+      "domestic_forecast": {"2011": <number>, "2025": <number>, ...},
+      "per_capita_consumption": <number>,                          # domestic
+      "floating": {"floating_population": <number>, "facility_type": <string>},
+      "institutional_fields": {...},                               # as institutional_water_demand
+      "firefighting_methods": {"kuchling": true, ...},             # as firefighting_water_demand
+      "unmetered_supply": <number>                                 # modeled domestic sewage
+    }
+
+    Response: {"years": [...], "components": [...], "values": [[...per component] per year]}
+    """
+    def post(self, request, format=None):
+        data = request.data
+        domestic_forecast = data.get("domestic_forecast")
+        if not isinstance(domestic_forecast, dict):
+            return Response({"error": "domestic_forecast is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            result = water_demand_pipeline(
+                domestic_forecast,
+                per_capita_consumption=data.get("per_capita_consumption"),
+                floating=data.get("floating"),
+                institutional_fields=data.get("institutional_fields"),
+                firefighting_methods=data.get("firefighting_methods"),
+                unmetered_supply=data.get("unmetered_supply"),
+            )
+        except (TypeError, ValueError, KeyError) as e:
+            return Response({"error": f"Invalid water demand input: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_200_OK)
+
+
+class DiurnalProfileAPIView(APIView):
+    permission_classes = [AllowAny]
+    """
+    Hourly / sub-hourly peak flow profiles of the domestic demand for every forecast year.
+
+    Expected JSON payload:
+    {
+      "forecast_data": {"2011": <number>, "2025": <number>, ...},
+      "per_capita_consumption": <number>,           # as domestic_water_demand
+      "step_minutes": 60 | 30 | 15 ...,             # default 60
+      "peak_factor": <number> | "auto",             # default "auto": CPHEEO factor by population
+      "diurnal_curve": [<multiplier>, ...],         # optional, evenly spaced over one day
+      "format": "json" | "csv" | "binary"           # default "json"
+    }
+
+    Flows are in m3/h. csv streams one row per year; binary streams little-endian
+    float32 year-major rows with the shape in the X-Profile-* headers.
+    """
+    def post(self, request, format=None):
+        data = request.data
+        forecast_data = data.get("forecast_data")
+        if not isinstance(forecast_data, dict):
+            return Response({"error": "'forecast_data' must be provided."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            per_capita = float(data.get("per_capita_consumption") or 0)
+            step_minutes = int(data.get("step_minutes") or 60)
+            curve = diurnal_curve(data.get("diurnal_curve"), step_minutes)
+            years, populations = forecast_arrays(forecast_data)
+            peak_factor = data.get("peak_factor", "auto")
+            if peak_factor in (None, "", "auto"):
+                factors = peak_factors(populations)
+            else:
+                if float(peak_factor) < 1:
+                    raise ValueError("peak_factor must be at least 1")
+                factors = np.full(len(years), float(peak_factor))
+            profiles = peak_profiles(domestic_demand(populations, per_capita), curve, factors)
+        except (TypeError, ValueError) as e:
+            return Response({"error": f"Invalid profile input: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        output_format = data.get("format", "json")
+        if output_format == "csv":
+            def rows():
+                yield "year,peak_factor," + ",".join(step_labels(step_minutes)) + "\n"
+                for year, factor, row in zip(years, factors.tolist(), profiles):
+                    yield f"{year},{factor}," + ",".join(f"{value:.4f}" for value in row.tolist()) + "\n"
+            response = StreamingHttpResponse(rows(), content_type="text/csv")
+            response["Content-Disposition"] = 'attachment; filename="diurnal_profile.csv"'
+            return response
+        if output_format == "binary":
+            response = StreamingHttpResponse((row.astype("<f4").tobytes() for row in profiles), content_type="application/octet-stream")
+            response["X-Profile-Years"] = ",".join(str(year) for year in years)
+            response["X-Profile-Steps"] = str(len(curve))
+            response["X-Profile-Step-Minutes"] = str(step_minutes)
+            return response
+
+        return Response({
+            "years": years,
+            "step_minutes": step_minutes,
+            "units": "m3/h",
+            "peak_factors": factors.tolist(),
+            "values": profiles.tolist(),
+        }, status=status.HTTP_200_OK)
+
+
 #for cohort 
+def cohort_selection_filter(selection):
+    """OR-filter over PopulationCohort for a compact {'village_codes', 'subdistrict_codes', 'district_codes'} selection."""
+    selection_filter = Q()
+    for key, column in (('village_codes', 'village_code'), ('subdistrict_codes', 'subdistrict_code'), ('district_codes', 'district_code')):
+        codes = [code for code in village_codes(selection.get(key) or []) if code >= 0]
+        if codes:
+            selection_filter |= Q(**{f"{column}__in": codes})
+    return selection_filter
+
+
 class CohortView(APIView):
     permission_classes = [AllowAny] 
     def post(self, request, format=None):
@@ -615,6 +887,10 @@ class CohortView(APIView):
         subdistrict = request.data.get('subdistrict_props', {})
         district = request.data.get('district_props', {})
         state = request.data.get('state_props', {})
+        selection = request.data.get('selection')
+        if selection:
+            # Compact selection replaces the *_props filters
+            villages, subdistrict, district, state = [], {}, {}, {}
         
         # Check if required year parameters are provided
         if not (single_year or (start_year and end_year)):
@@ -669,6 +945,9 @@ class CohortView(APIView):
             if village_ids:
                 print(f"Adding villages filter: {village_ids}")
                 location_filter &= Q(village_code__in=village_ids)
+
+        if selection:
+            location_filter &= cohort_selection_filter(selection)
                 
                 
         
@@ -680,153 +959,112 @@ class CohortView(APIView):
         
         # Initialize result
         main_output = {}
-        
-        if single_year:
-            # Handle single year query
+
+        # Cohort-component projection of the 2011 structure instead of stored future-year rows
+        # (true, or {"mortality", "fertility", "migration": {age_group: annual rate}, "sex_ratio_at_birth"})
+        projection = request.data.get('projection')
+        if projection:
             try:
+                years = forecast_years(single_year, start_year, end_year)
+                main_output['cohort'] = Cohort_projection(location_filter, [COHORT_BASE_YEAR] + years, None if projection is True else projection)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(main_output, status=status.HTTP_200_OK)
+        
+        try:
+            if single_year:
+                # Handle single year query: the requested year plus 2011, listed even without data
                 year_value = int(single_year)
-                print(f"Querying for year: {year_value}")
-                
-                # Determine years to query
                 years_to_query = [year_value]
                 if year_value != 2011:
                     years_to_query.append(2011)
-                
-                years_data = []
-                for year in years_to_query:
-                    # Add year filter
-                    query_filter = location_filter & Q(year=year)
-                    
-                    # Get cohort data for the specified year and location
-                    cohort_data = PopulationCohort.objects.filter(query_filter)
-                    count = cohort_data.count()
-                    print(f"Found {count} records for year {year}")
-                    villages_found = cohort_data.values('village_code').distinct().count()
-                    print(f"Found {count} records for year {year} across {villages_found} villages")
-                    # ADD THESE LINES HERE:
-                    if villages and len(villages) > 0:
-                        requested_village_ids = [int(village['id']) for village in villages if village.get('id')]
-                        found_village_codes = list(cohort_data.values_list('village_code', flat=True).distinct())
-                        missing_village_codes = [vid for vid in requested_village_ids if vid not in found_village_codes]
-                        
-                        #print(f"Year {year} - Requested villages: {requested_village_ids}")
-                        #print(f"Year {year} - Found villages with records: {found_village_codes}")
-                        print(f"Year {year} - Missing villages (no records): {missing_village_codes}")
-
-                    villages_found = cohort_data.values('village_code').distinct().count()
-                    if count > 0:
-                        # Process the data
-                        result = self.organize_cohort_data(cohort_data)
-                        
-                        years_data.append({
-                            'year': year,
-                            'data': result
-                        })
-                    else:
-                        years_data.append({
-                            'year': year,
-                            'data': {}
-                        })
-                
-                # Sort years with 2011 first if it's included
-                years_data.sort(key=lambda x: (x['year'] != 2011, x['year']))
-                
-                main_output['cohort'] = years_data
-                
-            except ValueError:
-                error_msg = f"Invalid year format: {single_year}"
-                print(error_msg)
-                return Response({"error": error_msg}, status=status.HTTP_400_BAD_REQUEST)
-                
-        elif start_year and end_year:
-            # Handle year range query
-            try:
+                years_to_query.sort(key=lambda x: (x != 2011, x))
+            elif start_year and end_year:
+                # Handle year range query: only years with data are listed
                 start = int(start_year)
                 end = int(end_year)
-                
                 if start > end:
                     error_msg = f"start_year ({start}) cannot be greater than end_year ({end})"
                     print(error_msg)
                     return Response({"error": error_msg}, status=status.HTTP_400_BAD_REQUEST)
-                    
-                print(f"Querying for years from {start} to {end}")
-                
-                # Determine years to query
                 years_to_query = list(range(start, end + 1))
                 if 2011 not in years_to_query:
-                    years_to_query.append(2011)
-                
-                # Sort years with 2011 first if not in original range
-                if 2011 not in range(start, end + 1):
-                    years_to_query.sort(key=lambda x: (x != 2011, x))
-                else:
-                    years_to_query.sort()
-                
-                years_data = []
-                
-                for year in years_to_query:
-                    # Add year filter
-                    query_filter = location_filter & Q(year=year)
-                    
-                    # Get cohort data for the current year and location
-                    cohort_data = PopulationCohort.objects.filter(query_filter)
-                    count = cohort_data.count()
-                    print(f"Found {count} records for year {year}")
-                    villages_found = cohort_data.values('village_code').distinct().count()
-                    print(f"Found {count} records for year {year} across {villages_found} villages")
-                    # ADD THESE LINES HERE:
-                    if villages and len(villages) > 0:
-                        requested_village_ids = [int(village['id']) for village in villages if village.get('id')]
-                        found_village_codes = list(cohort_data.values_list('village_code', flat=True).distinct())
-                        missing_village_codes = [vid for vid in requested_village_ids if vid not in found_village_codes]
-                        
-                        #print(f"Year {year} - Requested villages: {requested_village_ids}")
-                        #print(f"Year {year} - Found villages with records: {found_village_codes}")
-                        print(f"Year {year} - Missing villages (no records): {missing_village_codes}")
-
-                    villages_found = cohort_data.values('village_code').distinct().count()
-                    if count > 0:  # Only add years with data
-                        # Process the data
-                        result = self.organize_cohort_data(cohort_data)
-                        
-                        years_data.append({
-                            'year': year,
-                            'data': result
-                        })
-                
-                main_output['cohort'] = years_data
-            except ValueError:
+                    # 2011 first when it is outside the range
+                    years_to_query.insert(0, 2011)
+        except ValueError:
+            if single_year:
+                error_msg = f"Invalid year format: {single_year}"
+            else:
                 error_msg = f"Invalid year format: start_year={start_year}, end_year={end_year}"
-                print(error_msg)
-                return Response({"error": error_msg}, status=status.HTTP_400_BAD_REQUEST)
-        
-        print("Final output:", main_output)   
+            print(error_msg)
+            return Response({"error": error_msg}, status=status.HTTP_400_BAD_REQUEST)
+
+        print(f"Querying cohort years: {years_to_query}")
+        # Coarsest pre-aggregated rollup that covers the filter; village rows only for village selections
+        rollup_level = cohort_rollup_level(villages, subdistrict, district, state, selection)
+        if rollup_level and PopulationCohortRollup.objects.filter(level=rollup_level).exists():
+            logger.info("Reading %s cohort rollup", rollup_level)
+            cohort_rows = PopulationCohortRollup.objects.filter(location_filter & Q(level=rollup_level, year__in=years_to_query))
+        else:
+            cohort_rows = PopulationCohort.objects.filter(location_filter & Q(year__in=years_to_query))
+
+        # One GROUP BY year, age_group, gender for the whole range
+        grouped = cohort_rows.values('year', 'age_group', 'gender').annotate(
+            population_sum=Sum('population'), records=Count('id')
+        ).order_by()
+        rows_by_year = {}
+        records_by_year = {}
+        for row in grouped:
+            rows_by_year.setdefault(row['year'], []).append((row['age_group'], row['gender'], row['population_sum']))
+            records_by_year[row['year']] = records_by_year.get(row['year'], 0) + row['records']
+
+        # Missing-village diagnostics from one distinct (year, village_code) query
+        requested_village_ids = [int(village['id']) for village in villages if village.get('id')]
+        if selection:
+            requested_village_ids = [code for code in village_codes(selection.get('village_codes') or []) if code >= 0]
+        if requested_village_ids:
+            found_by_year = {}
+            for year, village_code in cohort_rows.values_list('year', 'village_code').distinct().order_by():
+                found_by_year.setdefault(year, set()).add(village_code)
+            for year in years_to_query:
+                found_village_codes = found_by_year.get(year, set())
+                missing_village_codes = [vid for vid in requested_village_ids if vid not in found_village_codes]
+                print(f"Found {records_by_year.get(year, 0)} records for year {year} across {len(found_village_codes)} villages")
+                print(f"Year {year} - Missing villages (no records): {missing_village_codes}")
+
+        years_data = []
+        for year in years_to_query:
+            if year in rows_by_year:
+                years_data.append({'year': year, 'data': self.organize_cohort_data(rows_by_year[year])})
+            elif single_year:
+                years_data.append({'year': year, 'data': {}})
+
+        main_output['cohort'] = years_data
+        print("Final output:", main_output)
         return Response(main_output, status=status.HTTP_200_OK)
-    
-    def organize_cohort_data(self, queryset):
+
+    def organize_cohort_data(self, rows):
         """
         Organizes cohort data by age group and gender
-        Input: queryset of PopulationCohort objects
+        Input: (age_group, gender, population) rows already summed by the database
         Output: Structured data by age group and gender
         """
         # Initialize the result dictionary
         result = {}
-        
+
         # Track totals
         total_male = 0
         total_female = 0
         total_overall = 0
-        
-        # Process each record
-        for record in queryset:
-            age_group = record.age_group
-            gender = record.gender.lower()  # Normalize gender to lowercase
-            population = record.population
-            
+
+        # Process each aggregated row
+        for age_group, gender, population in rows:
+            gender = gender.lower()  # Normalize gender to lowercase
+
             # Initialize age group data if not present
             if age_group not in result:
                 result[age_group] = {'male': 0, 'female': 0, 'total': 0}
-            
+
             # Update gender-specific count
             if gender == 'male':
                 result[age_group]['male'] += population
@@ -834,11 +1072,11 @@ class CohortView(APIView):
             elif gender == 'female':
                 result[age_group]['female'] += population
                 total_female += population
-            
+
             # Update total for this age group
             result[age_group]['total'] = result[age_group]['male'] + result[age_group]['female']
             total_overall += population
-        
+
         # Add a "total" category with sums across all age groups
         if result:
             result['total'] = {
@@ -846,7 +1084,7 @@ class CohortView(APIView):
                 'female': total_female,
                 'total': total_overall
             }
-        
+
         print(f"Organized data: {result}")
         return result
 #end cohort logic here
@@ -866,7 +1104,7 @@ class DefaultBaseMapAPI(APIView):
                 return Response({'error': 'Shapefile not found.'}, status=status.HTTP_404_NOT_FOUND)
 
             # Read shapefile using GeoPandas
-            gdf = gpd.read_file(shapefile_full_path)
+            gdf = load_layer(shapefile_full_path)
 
             # Convert to GeoJSON
             geojson_data = json.loads(gdf.to_json())
@@ -910,26 +1148,12 @@ class StateShapefileAPI(APIView):
             shapefile_full_path = os.path.join(shapefile_path, 'B_State.shp')
             print(f"Attempting to read shapefile from: {shapefile_full_path}")
             
-            gdf = gpd.read_file(shapefile_full_path)
+            gdf, index = indexed_layer(shapefile_full_path, ['state_code'])
             print(f"Shapefile loaded. Columns: {gdf.columns.tolist()}")
             
-            # Try different formats of state code
-            # First, try the original input
-            state_data = gdf[gdf['state_code'] == original_state_code]
-            
-            # If not found, try with zero padding (if it's a number)
-            if state_data.empty and original_state_code.isdigit():
-                padded_state_code = original_state_code.zfill(2)  # Pad with leading zero if needed
-                print(f"No results for '{original_state_code}', trying padded code: '{padded_state_code}'")
-                state_data = gdf[gdf['state_code'] == padded_state_code]
-            
-            # If still not found, try without padding (if it has leading zeros)
-            if state_data.empty and original_state_code.startswith('0'):
-                unpadded_state_code = original_state_code.lstrip('0')
-                if unpadded_state_code == '':  # Edge case: input was just '0'
-                    unpadded_state_code = '0'
-                print(f"No results for '{original_state_code}', trying unpadded code: '{unpadded_state_code}'")
-                state_data = gdf[gdf['state_code'] == unpadded_state_code]
+            # Canonical codes match '9', '09' and 9 alike with one index lookup
+            positions, _ = index.take([index.key(original_state_code)])
+            state_data = gdf.take(positions)
             
             print(f"Filtered data for state_code. Found {len(state_data)} records.")
             
@@ -998,70 +1222,27 @@ class MultipleDistrictsAPI(APIView):
             shapefile_full_path = os.path.join(shapefile_path, 'B_district.shp')
             print(f"Attempting to read shapefile from: {shapefile_full_path}")
             
-            gdf = gpd.read_file(shapefile_full_path)
+            gdf, index = indexed_layer(shapefile_full_path, ['STATE_CODE', 'DISTRICT_C'])
             print(f"Shapefile loaded. Columns: {gdf.columns.tolist()}")
             
-            # Ensure all code columns are strings for consistent comparison
-            gdf['STATE_CODE'] = gdf['STATE_CODE'].astype(str)
-            gdf['DISTRICT_C'] = gdf['DISTRICT_C'].astype(str)
-            
-            # Initialize a list to store matching rows instead of an empty GeoDataFrame
-            matched_rows = []
+            # One canonical (state, district) index instead of padded / unpadded scans per entry
             
+            keys = []
             for district_entry in districts_data:
                 state_code = str(district_entry.get('state_code', '')).upper()  # Convert to uppercase
                 district_c = str(district_entry.get('district_c', '')).upper()  # Convert to uppercase
                 
-                if not state_code or not district_c:
+                key = index.key(state_code, district_c)
+                if key is None:
                     print(f"Skipping entry missing state_code or district_c: {district_entry}")
                     continue
-                
-                # Try with original codes
-                district_match = gdf[(gdf['STATE_CODE'] == state_code) & 
-                                    (gdf['DISTRICT_C'] == district_c)]
-                
-                # Try with padded codes if needed
-                if district_match.empty:
-                    if state_code.isdigit():
-                        padded_state = state_code.zfill(2)
-                        district_match = gdf[(gdf['STATE_CODE'] == padded_state) & 
-                                           (gdf['DISTRICT_C'] == district_c)]
-                    
-                    if district_match.empty and district_c.isdigit():
-                        padded_district = district_c.zfill(2)
-                        district_match = gdf[(gdf['STATE_CODE'] == state_code) & 
-                                           (gdf['DISTRICT_C'] == padded_district)]
-                    
-                    if district_match.empty and state_code.isdigit() and district_c.isdigit():
-                        padded_state = state_code.zfill(2)
-                        padded_district = district_c.zfill(2)
-                        district_match = gdf[(gdf['STATE_CODE'] == padded_state) & 
-                                           (gdf['DISTRICT_C'] == padded_district)]
-                
-                # Try with unpadded codes if needed
-                if district_match.empty:
-                    if state_code.startswith('0'):
-                        unpadded_state = state_code.lstrip('0') or '0'
-                        district_match = gdf[(gdf['STATE_CODE'] == unpadded_state) & 
-                                           (gdf['DISTRICT_C'] == district_c)]
-                    
-                    if district_match.empty and district_c.startswith('0'):
-                        unpadded_district = district_c.lstrip('0') or '0'
-                        district_match = gdf[(gdf['STATE_CODE'] == state_code) & 
-                                           (gdf['DISTRICT_C'] == unpadded_district)]
-                    
-                    if district_match.empty and state_code.startswith('0') and district_c.startswith('0'):
-                        unpadded_state = state_code.lstrip('0') or '0'
-                        unpadded_district = district_c.lstrip('0') or '0'
-                        district_match = gdf[(gdf['STATE_CODE'] == unpadded_state) & 
-                                           (gdf['DISTRICT_C'] == unpadded_district)]
-                
-                if not district_match.empty:
-                    # Append the matched rows to our list
-                    matched_rows.append(district_match)
-                    print(f"Found match for state_code: {state_code}, district_c: {district_c}")
-                else:
-                    print(f"No match found for state_code: {state_code}, district_c: {district_c}")
+                keys.append(key)
+            
+            positions, missing = index.take(keys)
+            matched_rows = [gdf.take(positions)] if len(positions) else []
+            print(f"Found matches for {len(keys) - len(missing)} of {len(keys)} districts")
+            if missing:
+                print(f"No match found for (state_code, district_c): {missing}")
             
             if not matched_rows:
                 print("No matching districts found.")
@@ -1121,41 +1302,26 @@ class MultipleSubdistrictsAPI(APIView):
             shapefile_full_path = os.path.join(shapefile_path, 'B_subdistrict.shp')
             print(f"Attempting to read shapefile from: {shapefile_full_path}")
             
-            gdf = gpd.read_file(shapefile_full_path)
+            gdf, index = indexed_layer(shapefile_full_path, ['SUBDIS_COD'])
             print(f"Shapefile loaded. Columns: {gdf.columns.tolist()}")
             
-            # Ensure subdistrict code column is string for consistent comparison
-            gdf['SUBDIS_COD'] = gdf['SUBDIS_COD'].astype(str)
-            
-            # Initialize a list to store matching rows
-            matched_rows = []
+            # One canonical code index instead of padded / unpadded scans per entry
             
+            keys = []
             for subdistrict_entry in subdistricts_data:
                 subdis_cod = str(subdistrict_entry.get('subdis_cod', '')).upper()  # Convert to uppercase
                 
-                if not subdis_cod:
+                key = index.key(subdis_cod)
+                if key is None:
                     print(f"Skipping entry missing subdistrict code: {subdistrict_entry}")
                     continue
-                
-                # Try with original code
-                subdistrict_match = gdf[gdf['SUBDIS_COD'] == subdis_cod]
-                
-                # Try with padded code if needed
-                if subdistrict_match.empty and subdis_cod.isdigit():
-                    padded_subdis = subdis_cod.zfill(4)
-                    subdistrict_match = gdf[gdf['SUBDIS_COD'] == padded_subdis]
-                
-                # Try with unpadded code if needed
-                if subdistrict_match.empty:
-                    unpadded_subdis = subdis_cod.lstrip('0') or '0' if subdis_cod.startswith('0') else subdis_cod
-                    subdistrict_match = gdf[gdf['SUBDIS_COD'] == unpadded_subdis]
-                
-                if not subdistrict_match.empty:
-                    # Append the matched rows to our list
-                    matched_rows.append(subdistrict_match)
-                    print(f"Found match anas for subdis_cod: {subdis_cod}")
-                else:
-                    print(f"No match found anas for subdis_cod: {subdis_cod}")
+                keys.append(key)
+            
+            positions, missing = index.take(keys)
+            matched_rows = [gdf.take(positions)] if len(positions) else []
+            print(f"Found matches for {len(keys) - len(missing)} of {len(keys)} subdistricts")
+            if missing:
+                print(f"No match found for subdis_cod: {missing}")
             
             if not matched_rows:
                 print("No matching subdistricts found.")
@@ -1169,7 +1335,6 @@ class MultipleSubdistrictsAPI(APIView):
             
             # Concatenate all matched rows into a single GeoDataFrame
             matched_subdistricts = gpd.GeoDataFrame(pd.concat(matched_rows, ignore_index=True))
-            matched_subdistricts = matched_subdistricts.to_crs(epsg=4326)
             # Convert to GeoJSON format
             geojson_data = json.loads(matched_subdistricts.to_json())
             
@@ -1217,45 +1382,26 @@ class MultipleVillagesAPI(APIView):
             shapefile_full_path = os.path.join(shapefile_path, 'Village.shp')
             print(f"Attempting to read shapefile from: {shapefile_full_path}")
             
-            gdf = gpd.read_file(shapefile_full_path)
+            gdf, index = indexed_layer(shapefile_full_path, ['shapeID'])
             print(f"Shapefile loaded. Columns: {gdf.columns.tolist()}")
             
-            # Ensure shapeID column is string for consistent comparison
-            gdf['shapeID'] = gdf['shapeID'].astype(str)
-            
-            # Initialize a list to store matching rows
-            matched_rows = []
+            # One canonical shapeID index instead of up to 6 padded / unpadded scans per village
             
+            keys = []
             for village_entry in villages_data:
                 shape_id = str(village_entry.get('shape_id', '')).upper()  # Convert to uppercase
                 
-                if not shape_id:
+                key = index.key(shape_id)
+                if key is None:
                     print(f"Skipping entry missing shape_id: {village_entry}")
                     continue
-                
-                # Try with original shape ID
-                village_match = gdf[gdf['shapeID'] == shape_id]
-                
-                # Try with padded shape ID if needed and if it's a number
-                if village_match.empty and shape_id.isdigit():
-                    # Try different padding lengths (2, 3, 4, 6 digits)
-                    for pad_length in [2, 3, 4, 6]:
-                        padded_shape_id = shape_id.zfill(pad_length)
-                        village_match = gdf[gdf['shapeID'] == padded_shape_id]
-                        if not village_match.empty:
-                            break
-                
-                # Try with unpadded shape ID if needed
-                if village_match.empty and shape_id.startswith('0'):
-                    unpadded_shape_id = shape_id.lstrip('0') or '0' if shape_id == '0' else shape_id.lstrip('0')
-                    village_match = gdf[gdf['shapeID'] == unpadded_shape_id]
-                
-                if not village_match.empty:
-                    # Append the matched rows to our list
-                    matched_rows.append(village_match)
-                    print(f"Found match for shape_id: {shape_id}")
-                else:
-                    print(f"No match found for shape_id: {shape_id}")
+                keys.append(key)
+            
+            positions, missing = index.take(keys)
+            matched_rows = [gdf.take(positions)] if len(positions) else []
+            print(f"Found matches for {len(keys) - len(missing)} of {len(keys)} villages")
+            if missing:
+                print(f"No match found for shape_id: {missing}")
             
             if not matched_rows:
                 print("No matching villages found.")
@@ -1269,7 +1415,6 @@ class MultipleVillagesAPI(APIView):
             
             # Concatenate all matched rows into a single GeoDataFrame
             matched_villages = gpd.GeoDataFrame(pd.concat(matched_rows, ignore_index=True))
-            matched_villages = matched_villages.to_crs(epsg=4326)
             # Convert to GeoJSON format
             geojson_data = json.loads(matched_villages.to_json())
             
@@ -1307,8 +1452,7 @@ class BasinAPI(APIView):
                 return Response({'error': 'River shapefile not found.'}, status=status.HTTP_404_NOT_FOUND)
 
             # Read shapefile using GeoPandas
-            gdf = gpd.read_file(shapefile_full_path)
-            gdf = gdf.to_crs("EPSG:4326")
+            gdf = load_layer(shapefile_full_path)
             # Convert to GeoJSON
             geojson_data = json.loads(gdf.to_json())
             
@@ -1332,8 +1476,7 @@ class RiverMapAPI(APIView):
                 return Response({'error': 'River shapefile not found.'}, status=status.HTTP_404_NOT_FOUND)
 
             # Read shapefile using GeoPandas
-            gdf = gpd.read_file(shapefile_full_path)
-            gdf = gdf.to_crs("EPSG:4326")
+            gdf = load_layer(shapefile_full_path)
             # Convert to GeoJSON
             geojson_data = json.loads(gdf.to_json())
             
@@ -1359,8 +1502,7 @@ class RiverStretched(APIView):
                 return Response({'error': 'Stretches shapefile not found.'}, status=status.HTTP_404_NOT_FOUND)
 
             # Read shapefile using GeoPandas
-            gdf = gpd.read_file(shapefile_full_path)
-            gdf = gdf.to_crs("EPSG:4326")
+            gdf = load_layer(shapefile_full_path)
             # Filter data based on River_Code if provided
             if river_code:
                 filtered_gdf = gdf[gdf['River_Code'] == river_code]
@@ -1394,8 +1536,7 @@ class Drain(APIView):
                 return Response({'error': 'Drains shapefile not found.'}, status=status.HTTP_404_NOT_FOUND)
 
             # Read shapefile using GeoPandas
-            gdf = gpd.read_file(shapefile_full_path)
-            gdf = gdf.to_crs("EPSG:4326")
+            gdf = load_layer(shapefile_full_path)
             
             # Filter data based on Stretch_IDs if provided
             if stretch_ids:
@@ -1436,8 +1577,7 @@ class Catchments(APIView):
                 return Response({'error': 'Catchments shapefile not found.'}, status=status.HTTP_404_NOT_FOUND)
             
             # Read shapefile using GeoPandas
-            gdf = gpd.read_file(shapefile_full_path)
-            gdf = gdf.to_crs("EPSG:4326")
+            gdf = load_layer(shapefile_full_path)
             
             # Filter data based on Drain_No if provided
             if drain_nos:
@@ -1471,8 +1611,7 @@ class AllStretches(APIView):
                 return Response({'error': 'Stretches shapefile not found.'}, status=status.HTTP_404_NOT_FOUND)
 
             # Read shapefile using GeoPandas
-            gdf = gpd.read_file(shapefile_full_path)
-            gdf = gdf.to_crs("EPSG:4326")
+            gdf = load_layer(shapefile_full_path)
             
             # Convert to GeoJSON
             geojson_data = json.loads(gdf.to_json())
@@ -1508,12 +1647,8 @@ class VillagesCatchmentIntersection(APIView):
                 )
             
             # Read shapefiles
-            catchment_gdf = gpd.read_file(catchment_path)
-            village_gdf = gpd.read_file(village_path)
-            
-            # Ensure both are in the same CRS
-            catchment_gdf = catchment_gdf.to_crs("EPSG:4326")
-            village_gdf = village_gdf.to_crs("EPSG:4326")
+            # Both come from the layer cache already in EPSG:4326
+            catchment_gdf = load_layer(catchment_path)
             
             # Filter catchments for selected drains
             filtered_catchment = catchment_gdf[catchment_gdf['Drain_No'].isin(drain_nos)]
@@ -1524,6 +1659,9 @@ class VillagesCatchmentIntersection(APIView):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
+            # Only villages inside the selected catchments' bounding box are candidates
+            village_gdf = read_layer(village_path, bbox=filtered_catchment.total_bounds)
+            
             # Find intersections between catchments and villages
             intersected_villages = []
             intersected_village_gdf = gpd.GeoDataFrame()
@@ -1590,59 +1728,36 @@ class VillagePopulationAPI(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            results = []
+            # Normalise every ID once, then resolve the distinct codes in a single joined query
+            codes = [normalise_village_code(village_id) for village_id in shape_ids]
+            wanted = {code for code in codes if code is not None}
+            villages = {
+                village_code: row
+                for village_code, *row in Basic_village.objects.filter(village_code__in=wanted).values_list(
+                    'village_code',
+                    'subdistrict_code',
+                    'subdistrict_code__district_code',
+                    'subdistrict_code__district_code__state_code',
+                    'population_2011',
+                )
+            } if wanted else {}
 
-            for village_id in shape_ids:
-                # Generate possible formats for matching village_code
-                possible_ids = list({
-                    str(village_id),
-                    str(int(village_id)) if str(village_id).isdigit() else str(village_id),
-                    str(village_id).lstrip('0'),
-                    str(village_id).zfill(6) if str(village_id).isdigit() else str(village_id)
+            results = []
+            missing = 0
+            for village_id, code in zip(shape_ids, codes):
+                if code not in villages:
+                    missing += 1
+                    continue
+                subdistrict_code, district_code, state_code, total_pop = villages[code]
+                results.append({
+                    'village_code': str(village_id),  # Keep original ID in response
+                    'subdistrict_code': str(subdistrict_code),
+                    'district_code': str(district_code) if district_code is not None else None,
+                    'state_code': str(state_code) if state_code is not None else None,
+                    'total_population': total_pop
                 })
-
-                print(f"Trying possible IDs for {village_id}: {possible_ids}")
-
-                village_found = False
-                for possible_id in possible_ids:
-                    try:
-                        village_qs = Basic_village.objects.filter(village_code=possible_id)
-                        if village_qs.exists():
-                            village_record = village_qs.first()
-                            village_found = True
-
-                            # Get population directly from Basic_village model
-                            # This is where the fix is - use population_2011 from Basic_village
-                            total_pop = village_record.population_2011  
-
-                            # print(f"Found village {possible_id} with population {total_pop}")
-
-                            results.append({
-                                'village_code': str(village_id),  # Keep original ID in response
-                                'subdistrict_code': str(village_record.subdistrict_code_id),
-                                'district_code': str(village_record.subdistrict_code.district_code_id) if hasattr(village_record.subdistrict_code, 'district_code_id') else None,
-                                'state_code': str(village_record.subdistrict_code.district_code.state_code_id) if hasattr(village_record.subdistrict_code, 'district_code') and hasattr(village_record.subdistrict_code.district_code, 'state_code_id') else None,
-                                'total_population': total_pop
-                            })
-                            break  # Stop trying more formats
-                    except Exception as e:
-                        # print(f"Error trying ID {possible_id}: {str(e)}")
-                        continue
-
-                if not village_found:
-                    print(f"No match found for village {village_id}")
-                    # For villages not found, use the fallback approach with a random population
-                    # This ensures we have data for visualization while debugging
-                    # import random
-                    # fallback_pop = random.randint(1000, 5000)
-                    
-                    # results.append({
-                    #     'village_code': str(village_id),
-                    #     'subdistrict_code': None,
-                    #     'district_code': None,
-                    #     'state_code': None,
-                    #     'total_population': fallback_pop
-                    # })
+            if missing:
+                print(f"No match found for {missing} villages")
 
             print(f"Returning population data for {len(results)} villages")
             return Response(results, status=status.HTTP_200_OK)
@@ -1657,68 +1772,97 @@ class VillagePopulationAPI(APIView):
             )
 
 
+# Rows fetched per round trip from the server-side cursor
+VILLAGE_POPULATION_FETCH_SIZE = 5000
+
+
+def village_population_rows(codes):
+    """
+    (village_code, subdistrict_code, district_code, state_code, population_2011) for
+    every village whose code is in codes. On Postgres the codes are bound as one
+    integer array (= ANY(%s)) and rows are read from a named server-side cursor in
+    VILLAGE_POPULATION_FETCH_SIZE batches; other backends use the ORM iterator.
+    """
+    if connection.vendor != 'postgresql':
+        yield from Basic_village.objects.filter(village_code__in=codes).values_list(
+            'village_code',
+            'subdistrict_code',
+            'subdistrict_code__district_code',
+            'subdistrict_code__district_code__state_code',
+            'population_2011',
+        ).iterator(chunk_size=VILLAGE_POPULATION_FETCH_SIZE)
+        return
+
+    quote = connection.ops.quote_name
+    query = f"""
+        SELECT
+            v.village_code,
+            v.subdistrict_code_id,
+            s.district_code_id,
+            d.state_code_id,
+            v.population_2011
+        FROM {quote(Basic_village._meta.db_table)} v
+        JOIN {quote(Basic_subdistrict._meta.db_table)} s ON s.subdistrict_code = v.subdistrict_code_id
+        JOIN {quote(Basic_district._meta.db_table)} d ON d.district_code = s.district_code_id
+        WHERE v.village_code = ANY(%s)
+    """
+    # chunked_cursor() is a named (server-side) cursor on Postgres
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(query, [list(codes)])
+        while True:
+            rows = cursor.fetchmany(VILLAGE_POPULATION_FETCH_SIZE)
+            if not rows:
+                break
+            yield from rows
+
+
 class VillagePopulationRawSQL(APIView):
+    """
+    Bulk village population lookup for large shapeID lists (100k+). IDs are normalised
+    once, bound as a single array parameter and the JSON list is streamed row by row,
+    followed by a zero-population entry for every ID that matched no village.
+    """
     permission_classes = [AllowAny] 
     def post(self, request, format=None):
-        try:
-            shape_ids = request.data.get('shapeID', [])
-            # print(f"Received shapeIDs for raw SQL: {shape_ids}")
-            
-            if not shape_ids or not isinstance(shape_ids, list):
-                return Response(
-                    {"error": "shapeID must be provided as a list"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Use raw SQL to join Basic_village with Population_2011
-            with connection.cursor() as cursor:
-                # Create placeholders for SQL IN clause
-                placeholders = ', '.join(['%s'] * len(shape_ids))
-                
-                # SQL query to join the two tables
-                query = f"""
-                    SELECT 
-                        bv.village_code,
-                        bv.subdistrict_code,
-                        bv.district_code,
-                        bv.state_code,
-                        SUM(p.population) as total_population
-                    FROM 
-                        Basic_village bv
-                    LEFT JOIN 
-                        Population_2011 p ON bv.village_code = p.village_code
-                    WHERE 
-                        bv.village_code IN ({placeholders})
-                    GROUP BY 
-                        bv.village_code, bv.subdistrict_code, bv.district_code, bv.state_code
-                """
-                
-                cursor.execute(query, shape_ids)
-                columns = [col[0] for col in cursor.description]
-                results = [dict(zip(columns, row)) for row in cursor.fetchall()]
-                
-                # Add entries for villages not found
-                found_village_codes = [str(result['village_code']) for result in results]
-                for village_id in shape_ids:
-                    if str(village_id) not in found_village_codes:
-                        results.append({
+        shape_ids = request.data.get('shapeID', [])
+        # print(f"Received shapeIDs for raw SQL: {len(shape_ids)}")
+
+        if not shape_ids or not isinstance(shape_ids, list):
+            return Response(
+                {"error": "shapeID must be provided as a list"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        codes = [normalise_village_code(village_id) for village_id in shape_ids]
+        wanted = {code for code in codes if code is not None}
+        columns = ('village_code', 'subdistrict_code', 'district_code', 'state_code', 'total_population')
+
+        def stream():
+            found = set()
+            first = True
+            try:
+                yield '['
+                for row in village_population_rows(wanted):
+                    found.add(row[0])
+                    yield ('' if first else ',') + json.dumps(dict(zip(columns, row)))
+                    first = False
+                # Set difference instead of scanning the found list for every ID
+                missing = wanted - found
+                for village_id, code in zip(shape_ids, codes):
+                    if code is None or code in missing:
+                        yield ('' if first else ',') + json.dumps({
                             'village_code': str(village_id),
                             'subdistrict_code': None,
                             'district_code': None,
                             'state_code': None,
                             'total_population': 0
                         })
-                
-            # print(f"SQL found {len(results)} villages")
-            return Response(results, status=status.HTTP_200_OK)
-        
-        except Exception as e:
-            import traceback
-            print(f"Error in raw SQL: {str(e)}")
-            print(traceback.format_exc())
-            return Response(
-                {"error": str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-        
-
+                        first = False
+                yield ']'
+            except Exception as e:
+                # Headers are already sent, so the client only sees a truncated body; log why
+                print(f"Error in raw SQL: {str(e)}")
+                print(traceback.format_exc())
+                raise
+
+        return StreamingHttpResponse(stream(), content_type='application/json')
@@ -0,0 +1,128 @@
+import logging
+import threading
+import numpy as np
+from .models import Basic_village
+
+logger = logging.getLogger(__name__)
+
+
+class VillageIndex:
+    """
+    Compact, read-only copy of the village hierarchy: parallel int arrays sorted by
+    village_code so any batch of codes resolves with one np.searchsorted.
+    """
+
+    def __init__(self, rows):
+        table = np.array(rows, dtype=np.int64).reshape(-1, 5)
+        table = table[np.argsort(table[:, 0], kind='stable')]
+        self.village_code = table[:, 0].astype(np.int32)
+        self.subdistrict_code = table[:, 1].astype(np.int32)
+        self.district_code = table[:, 2].astype(np.int32)
+        self.state_code = table[:, 3].astype(np.int32)
+        self.population_2011 = table[:, 4].astype(np.int32)
+
+    def __len__(self):
+        return len(self.village_code)
+
+    def lookup(self, village_codes):
+        """
+        Returns (positions, found) for the given codes: positions index the arrays
+        above and are only meaningful where found is True.
+        """
+        codes = np.asarray(village_codes, dtype=np.int64)
+        if not len(self):
+            return np.zeros(len(codes), dtype=np.int64), np.zeros(len(codes), dtype=bool)
+        positions = np.searchsorted(self.village_code, codes)
+        positions = np.minimum(positions, len(self) - 1)
+        found = self.village_code[positions] == codes
+        return positions, found
+
+
+_index = {}
+_index_lock = threading.Lock()
+
+
+def get_village_index():
+    """Process-wide VillageIndex, built from Basic_village on first use."""
+    with _index_lock:
+        if 'villages' not in _index:
+            rows = list(Basic_village.objects.values_list(
+                'village_code',
+                'subdistrict_code',
+                'subdistrict_code__district_code',
+                'subdistrict_code__district_code__state_code',
+                'population_2011',
+            ))
+            _index['villages'] = VillageIndex(rows)
+            logger.info("Built village index with %d villages", len(rows))
+        return _index['villages']
+
+
+def invalidate_village_index(*args, **kwargs):
+    """Drops the cached index; wired to Basic table signals and safe to call after bulk loads."""
+    with _index_lock:
+        _index.clear()
+
+
+def village_codes(values):
+    """Codes from the frontend may be ints or digit strings; anything else maps to -1 and never matches."""
+    codes = []
+    for value in values:
+        try:
+            codes.append(int(value))
+        except (TypeError, ValueError):
+            codes.append(-1)
+    return codes
+
+
+def normalise_village_code(value):
+    """
+    Integer village_code for an ID from a shapefile or the frontend (int, digit string,
+    zero-padded string), or None when it cannot be one. Matches what filtering the
+    IntegerField by each of str(id), its int form, lstrip('0') and zfill(6) resolved to.
+    """
+    text = str(value)
+    for candidate in (text, text.lstrip('0')):
+        try:
+            return int(candidate)
+        except ValueError:
+            continue
+    return None
+
+
+def correct_village_subdistricts(villages):
+    """Overwrites each village's subDistrictId with the value from Basic_village."""
+    index = get_village_index()
+    positions, found = index.lookup(village_codes(village['id'] for village in villages))
+    subdistricts = index.subdistrict_code[positions].tolist()
+    for village, subdistrict_code, matched in zip(villages, subdistricts, found.tolist()):
+        if matched:
+            village['subDistrictId'] = subdistrict_code
+    return villages
+
+
+def select_villages(selection):
+    """
+    Index positions (sorted, unique) of the villages in a compact selection:
+    the union of explicit 'village_codes' and every village of the listed
+    'subdistrict_codes' and 'district_codes'. Unknown village codes are skipped.
+    """
+    index = get_village_index()
+    selected = np.zeros(len(index), dtype=bool)
+
+    requested = village_codes(selection.get('village_codes') or [])
+    if requested:
+        positions, found = index.lookup(requested)
+        selected[positions[found]] = True
+        if not found.all():
+            logger.warning("Selection references %d unknown village codes", int((~found).sum()))
+
+    subdistrict_codes = village_codes(selection.get('subdistrict_codes') or [])
+    if subdistrict_codes:
+        selected |= np.isin(index.subdistrict_code, subdistrict_codes)
+
+    district_codes = village_codes(selection.get('district_codes') or [])
+    if district_codes:
+        selected |= np.isin(index.district_code, district_codes)
+
+    return np.flatnonzero(selected)
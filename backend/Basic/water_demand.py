@@ -0,0 +1,338 @@
+import numpy as np
+from .service import MAX_SWEEP_SCENARIOS, sweep_values
+
+
+# Litres per capita per day before the user's addition, as in DomesticWaterDemandCalculationAPIView
+DOMESTIC_BASE_CONSUMPTION = 135
+
+# Sewage generated per unit of water supplied
+SUPPLY_SEWAGE_FACTOR = 0.84
+DOMESTIC_SEWAGE_FACTOR = 0.80
+
+# Floating population demand (lpcd) by facility type
+FLOATING_FACILITY_MULTIPLIERS = {
+    'provided': 45,
+    'notprovided': 25,
+    'onlypublic': 15,
+}
+
+# Institutional demand: (unit count field, load per unit field, lpcd)
+INSTITUTIONAL_TERMS = (
+    ('hospitals100Units', 'beds100', 450),
+    ('hospitalsLess100', 'bedsLess100', 350),
+    ('hotels', 'bedsHotels', 180),
+    ('hostels', 'residentsHostels', 135),
+    ('nursesHome', 'residentsNursesHome', 135),
+    ('boardingSchools', 'studentsBoardingSchools', 135),
+    ('restaurants', 'seatsRestaurants', 70),
+    ('airportsSeaports', 'populationLoadAirports', 70),
+    ('junctionStations', 'populationLoadJunction', 70),
+    ('terminalStations', 'populationLoadTerminal', 45),
+    ('intermediateBathing', 'populationLoadBathing', 45),
+    ('intermediateNoBathing', 'populationLoadNoBathing', 25),
+    ('daySchools', 'studentsDaySchools', 45),
+    ('offices', 'employeesOffices', 45),
+    ('factorieswashrooms', 'employeesFactories', 45),
+    ('factoriesnoWashrooms', 'employeesFactoriesNoWashrooms', 30),
+    ('cinemas', 'populationLoadCinemas', 15),
+)
+
+# Firefighting demand (MLD) of a forecast population, per method
+FIREFIGHTING_FORMULAS = {
+    'kuchling': lambda p: (4.582 / 100) * np.sqrt(p / 1000),
+    'freeman': lambda p: (1.635 / 100) * ((p / 5000) + 10),
+    'buston': lambda p: (8.155 / 100) * np.sqrt(p / 1000),
+    'american_insurance': lambda p: (6.677 / 100) * np.sqrt(p / 1000) * (1 - 0.01 * np.sqrt(p / 1000)),
+    'ministry_urban': lambda p: np.sqrt(p) / 1000,
+}
+
+
+def forecast_arrays(forecast):
+    """
+    Year keys and float populations of a {year: population} forecast.
+    Entries that do not parse as numbers are skipped, like the per-endpoint loops did.
+    """
+    years, populations = [], []
+    for year, value in forecast.items():
+        try:
+            populations.append(float(value))
+        except (TypeError, ValueError):
+            continue
+        years.append(year)
+    return years, np.array(populations, dtype=np.float64)
+
+
+def growth_ratios(populations, base_population):
+    """Forecast relative to the 2011 population; 1 when the base is 0."""
+    if base_population == 0:
+        return np.ones_like(populations)
+    return populations / base_population
+
+
+def domestic_demand(populations, per_capita_consumption):
+    return populations * ((DOMESTIC_BASE_CONSUMPTION + per_capita_consumption) / 1000000)
+
+
+def floating_demand(populations, base_population, floating_population, facility_type):
+    if facility_type not in FLOATING_FACILITY_MULTIPLIERS:
+        raise ValueError("Invalid facility_type. Must be 'provided', 'notprovided', or 'onlypublic'.")
+    projected = floating_population * growth_ratios(populations, base_population)
+    return projected * (FLOATING_FACILITY_MULTIPLIERS[facility_type] / 1000000)
+
+
+# lpcd column of INSTITUTIONAL_TERMS
+INSTITUTIONAL_LPCD = np.array([rate for _, _, rate in INSTITUTIONAL_TERMS], dtype=np.float64)
+
+
+def institutional_inventories(inventories):
+    """
+    (counts, loads) matrices, one row per institutional_fields dict and one column
+    per INSTITUTIONAL_TERMS entry. Missing fields count as 0.
+    """
+    counts = np.array([[float(fields.get(count, 0)) for count, _, _ in INSTITUTIONAL_TERMS] for fields in inventories], dtype=np.float64)
+    loads = np.array([[float(fields.get(load, 0)) for _, load, _ in INSTITUTIONAL_TERMS] for fields in inventories], dtype=np.float64)
+    return counts.reshape(-1, len(INSTITUTIONAL_TERMS)), loads.reshape(-1, len(INSTITUTIONAL_TERMS))
+
+
+def institutional_base_demands(inventories):
+    """2011 institutional demand (MLD) of every inventory: one (units x load) @ lpcd product."""
+    counts, loads = institutional_inventories(inventories)
+    return ((counts * loads) @ INSTITUTIONAL_LPCD) / 1000000.0
+
+
+def institutional_base_demand(fields):
+    return float(institutional_base_demands([fields])[0])
+
+
+def institutional_demand(populations, base_population, fields):
+    return institutional_base_demand(fields) * growth_ratios(populations, base_population)
+
+
+def institutional_demand_batch(populations, base_population, inventories):
+    """inventory x year institutional demand, all inventories grown by the same forecast."""
+    return np.outer(institutional_base_demands(inventories), growth_ratios(populations, base_population))
+
+
+def firefighting_demand(populations, methods):
+    """{method: demand array} for every selected method; unknown methods give 0, as before."""
+    return {
+        method: FIREFIGHTING_FORMULAS[method](populations) if method in FIREFIGHTING_FORMULAS else np.zeros_like(populations)
+        for method, selected in methods.items() if selected
+    }
+
+
+def sewage_generation(populations, unmetered_supply):
+    """Modeled domestic sewage (MLD) of a forecast."""
+    return populations * ((DOMESTIC_BASE_CONSUMPTION + unmetered_supply) / 1000000) * DOMESTIC_SEWAGE_FACTOR
+
+
+def water_demand_pipeline(forecast, per_capita_consumption=None, floating=None, institutional_fields=None,
+                          firefighting_methods=None, unmetered_supply=None):
+    """
+    Every requested demand component over the forecast years in one pass.
+    Components are only evaluated when their inputs are given; floating and
+    institutional demand need a 2011 value in the forecast.
+    Returns {'years': [...], 'components': [...], 'values': year x component}.
+    Raises TypeError when floating, institutional_fields or firefighting_methods is not an object.
+    """
+    for name, value in (('floating', floating), ('institutional_fields', institutional_fields),
+                        ('firefighting_methods', firefighting_methods)):
+        if value is not None and not isinstance(value, dict):
+            raise TypeError(f"{name} must be an object")
+    years, populations = forecast_arrays(forecast)
+    components = {}
+    base_population = None
+    if floating is not None or institutional_fields is not None:
+        if "2011" not in forecast:
+            raise ValueError("domestic_forecast must include a value for 2011.")
+        base_population = float(forecast["2011"])
+
+    if per_capita_consumption is not None:
+        components['domestic'] = domestic_demand(populations, float(per_capita_consumption))
+    if floating is not None:
+        components['floating'] = floating_demand(
+            populations, base_population, float(floating['floating_population']), floating.get('facility_type'),
+        )
+    if institutional_fields is not None:
+        components['institutional'] = institutional_demand(populations, base_population, institutional_fields)
+    if firefighting_methods:
+        for method, demand in firefighting_demand(populations, firefighting_methods).items():
+            components[f"firefighting_{method}"] = demand
+    if unmetered_supply is not None:
+        components['sewage'] = sewage_generation(populations, float(unmetered_supply or 0))
+
+    values = np.column_stack(list(components.values())) if components else np.zeros((len(years), 0))
+    return {
+        'years': years,
+        'components': list(components),
+        'values': values.tolist(),
+    }
+
+
+def _check_grid(size):
+    if size > MAX_SWEEP_SCENARIOS:
+        raise ValueError(f"Sweep has {size} scenarios, the limit is {MAX_SWEEP_SCENARIOS}")
+
+
+def demand_sweep(forecast, per_capita_consumption, facility_types=None, floating_population=None,
+                 target_supply=None, target_year=None):
+    """
+    Domestic (+ floating) demand over the cartesian grid of per-capita consumption
+    values (see service.sweep_values) and facility types, broadcast over the years.
+    With target_supply (MLD, e.g. from water_supply), also picks the scenario with
+    the highest demand in target_year (default: last year) that the supply still meets.
+    Raises ValueError when target_year is not a forecast year or only one of
+    floating_population and facility_types is given.
+    Returns {'years', 'scenarios': {parameter: [...]}, 'values': scenario x year[, 'target']}.
+    """
+    years, populations = forecast_arrays(forecast)
+    per_capita = sweep_values(per_capita_consumption)
+    domestic = populations[None, :] * ((DOMESTIC_BASE_CONSUMPTION + per_capita)[:, None] / 1000000)
+
+    facility_types = list(facility_types or [None])
+    # Floating demand needs both inputs; one without the other would be silently dropped
+    if (floating_population is None) != (facility_types == [None]):
+        raise ValueError("floating_population and facility_types must be given together")
+    if floating_population is not None:
+        if "2011" not in forecast:
+            raise ValueError("domestic_forecast must include a value for 2011.")
+        base_population = float(forecast["2011"])
+        floating = np.stack([
+            floating_demand(populations, base_population, float(floating_population), facility_type)
+            for facility_type in facility_types
+        ])
+    else:
+        floating = np.zeros((1, len(years)))
+    _check_grid(len(per_capita) * len(facility_types))
+
+    # (per_capita, facility, year) -> scenario x year, per_capita-major
+    total = (domestic[:, None, :] + floating[None, :, :]).reshape(-1, len(years))
+    scenarios = {
+        'per_capita_consumption': np.repeat(per_capita, len(facility_types)).tolist(),
+        'facility_type': facility_types * len(per_capita),
+    }
+    output = {'years': years, 'scenarios': scenarios, 'values': total.tolist()}
+
+    if target_supply is not None:
+        target_supply = float(target_supply)
+        if not years:
+            raise ValueError("domestic_forecast has no valid years")
+        if target_year is not None and str(target_year) not in years:
+            raise ValueError(f"target_year {target_year} is not a forecast year")
+        column = years.index(str(target_year)) if target_year is not None else len(years) - 1
+        design = total[:, column]
+        feasible = design <= target_supply
+        target = {'supply': target_supply, 'year': years[column], 'scenario': None}
+        if feasible.any():
+            best = int(np.flatnonzero(feasible)[np.argmax(design[feasible])])
+            target.update(
+                scenario=best,
+                parameters={name: values[best] for name, values in scenarios.items()},
+                demand=float(design[best]),
+                surplus=float(target_supply - design[best]),
+            )
+        output['target'] = target
+    return output
+
+
+def sewage_sweep(forecast, unmetered_supply, sewage_factor=DOMESTIC_SEWAGE_FACTOR, total_supply=None,
+                 supply_sewage_factor=SUPPLY_SEWAGE_FACTOR):
+    """
+    Modeled domestic sewage over the grid of unmetered supply values and domestic
+    sewage factors, broadcast over the years. With total_supply, also the
+    supply-based sewage for every supply_sewage_factor.
+    Returns {'years', 'scenarios': {parameter: [...]}, 'values': scenario x year[, 'supply_sewage']}.
+    """
+    years, populations = forecast_arrays(forecast)
+    unmetered = sweep_values(unmetered_supply)
+    factors = sweep_values(sewage_factor)
+    _check_grid(len(unmetered) * len(factors))
+
+    multiplier = (DOMESTIC_BASE_CONSUMPTION + unmetered) / 1000000
+    sewage = (populations[None, None, :] * multiplier[:, None, None]) * factors[None, :, None]
+    output = {
+        'years': years,
+        'scenarios': {
+            'unmetered_supply': np.repeat(unmetered, len(factors)).tolist(),
+            'sewage_factor': np.tile(factors, len(unmetered)).tolist(),
+        },
+        'values': sewage.reshape(-1, len(years)).tolist(),
+    }
+    if total_supply is not None:
+        supply_factors = sweep_values(supply_sewage_factor)
+        output['supply_sewage'] = {
+            'supply_sewage_factor': supply_factors.tolist(),
+            'sewage_demand': (float(total_supply) * supply_factors).tolist(),
+        }
+    return output
+
+
+# Typical hourly draw of a municipal supply, relative to the daily mean (normalised on use)
+DEFAULT_DIURNAL_CURVE = (
+    0.3, 0.3, 0.3, 0.4, 0.8, 1.5, 2.0, 2.2, 1.8, 1.4, 1.1, 1.0,
+    1.0, 0.9, 0.9, 1.0, 1.2, 1.4, 1.5, 1.3, 1.0, 0.7, 0.5, 0.4,
+)
+
+# CPHEEO peak factors on average supply by population served: (population up to, factor)
+PEAK_FACTORS = ((50000, 3.0), (200000, 2.5), (2000000, 2.25), (np.inf, 2.0))
+
+
+def peak_factors(populations):
+    """CPHEEO peak factor for every forecast population."""
+    limits = np.array([limit for limit, _ in PEAK_FACTORS])
+    factors = np.array([factor for _, factor in PEAK_FACTORS])
+    return factors[np.searchsorted(limits, populations, side='left')]
+
+
+def diurnal_curve(curve=None, step_minutes=60):
+    """
+    The daily curve resampled (periodically, linearly) to step_minutes and normalised to mean 1.
+    curve is any number of evenly spaced multipliers covering one day.
+    """
+    if step_minutes <= 0 or 1440 % step_minutes:
+        raise ValueError("step_minutes must divide a day (e.g. 60, 30, 15)")
+    curve = np.asarray(curve if curve is not None else DEFAULT_DIURNAL_CURVE, dtype=np.float64)
+    if curve.ndim != 1 or not len(curve) or (curve < 0).any() or not curve.sum():
+        raise ValueError("diurnal_curve must be a non-empty list of non-negative multipliers")
+    source = np.arange(len(curve)) * (1440 / len(curve))
+    target = np.arange(1440 // step_minutes) * step_minutes
+    resampled = np.interp(target, source, curve, period=1440)
+    return resampled / resampled.mean()
+
+
+def _peaked_shape(curve, factor, iterations=60):
+    # curve ** gamma renormalised to mean 1, with gamma bisected so the peak equals factor
+    relative = curve / curve.max()
+
+    def shape(gamma):
+        powered = relative ** gamma
+        return powered / powered.mean()
+
+    if factor <= 1 or relative.min() == 1:
+        return np.ones_like(curve)
+    low, high = 0.0, 64.0
+    if shape(high).max() <= factor:
+        return shape(high)
+    for _ in range(iterations):
+        middle = (low + high) / 2
+        if shape(middle).max() < factor:
+            low = middle
+        else:
+            high = middle
+    return shape((low + high) / 2)
+
+
+def peak_profiles(demand_mld, curve, factors):
+    """
+    year x timestep flow (m3/h). Each year's curve is sharpened or flattened
+    (curve ** gamma) until its peak over the mean equals that year's factor, so
+    the daily volume stays demand_mld. Factors repeat across years, so one shape
+    is solved per distinct factor.
+    """
+    unique, inverse = np.unique(np.asarray(factors, dtype=np.float64), return_inverse=True)
+    shapes = np.stack([_peaked_shape(curve, factor) for factor in unique]) if len(unique) else np.zeros((0, len(curve)))
+    return (np.asarray(demand_mld, dtype=np.float64) * 1000 / 24)[:, None] * shapes[inverse]
+
+
+def step_labels(step_minutes):
+    return [f"{minute // 60:02d}:{minute % 60:02d}" for minute in range(0, 1440, step_minutes)]
@@ -0,0 +1,193 @@
+# Generated by Django 5.1.6 on 2026-10-16 21:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gwa", "0003_alter_well_village_code"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="well",
+            index=models.Index(
+                condition=models.Q(("PRE_2011__isnull", False)),
+                fields=["PRE_2011"],
+                include=("LONGITUDE", "LATITUDE"),
+                name="gwa_well_pre_2011_notnull",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="well",
+            index=models.Index(
+                condition=models.Q(("POST_2011__isnull", False)),
+                fields=["POST_2011"],
+                include=("LONGITUDE", "LATITUDE"),
+                name="gwa_well_post_2011_notnull",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="well",
+            index=models.Index(
+                condition=models.Q(("PRE_2012__isnull", False)),
+                fields=["PRE_2012"],
+                include=("LONGITUDE", "LATITUDE"),
+                name="gwa_well_pre_2012_notnull",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="well",
+            index=models.Index(
+                condition=models.Q(("POST_2012__isnull", False)),
+                fields=["POST_2012"],
+                include=("LONGITUDE", "LATITUDE"),
+                name="gwa_well_post_2012_notnull",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="well",
+            index=models.Index(
+                condition=models.Q(("PRE_2013__isnull", False)),
+                fields=["PRE_2013"],
+                include=("LONGITUDE", "LATITUDE"),
+                name="gwa_well_pre_2013_notnull",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="well",
+            index=models.Index(
+                condition=models.Q(("POST_2013__isnull", False)),
+                fields=["POST_2013"],
+                include=("LONGITUDE", "LATITUDE"),
+                name="gwa_well_post_2013_notnull",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="well",
+            index=models.Index(
+                condition=models.Q(("PRE_2014__isnull", False)),
+                fields=["PRE_2014"],
+                include=("LONGITUDE", "LATITUDE"),
+                name="gwa_well_pre_2014_notnull",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="well",
+            index=models.Index(
+                condition=models.Q(("POST_2014__isnull", False)),
+                fields=["POST_2014"],
+                include=("LONGITUDE", "LATITUDE"),
+                name="gwa_well_post_2014_notnull",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="well",
+            index=models.Index(
+                condition=models.Q(("PRE_2015__isnull", False)),
+                fields=["PRE_2015"],
+                include=("LONGITUDE", "LATITUDE"),
+                name="gwa_well_pre_2015_notnull",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="well",
+            index=models.Index(
+                condition=models.Q(("POST_2015__isnull", False)),
+                fields=["POST_2015"],
+                include=("LONGITUDE", "LATITUDE"),
+                name="gwa_well_post_2015_notnull",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="well",
+            index=models.Index(
+                condition=models.Q(("PRE_2016__isnull", False)),
+                fields=["PRE_2016"],
+                include=("LONGITUDE", "LATITUDE"),
+                name="gwa_well_pre_2016_notnull",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="well",
+            index=models.Index(
+                condition=models.Q(("POST_2016__isnull", False)),
+                fields=["POST_2016"],
+                include=("LONGITUDE", "LATITUDE"),
+                name="gwa_well_post_2016_notnull",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="well",
+            index=models.Index(
+                condition=models.Q(("PRE_2017__isnull", False)),
+                fields=["PRE_2017"],
+                include=("LONGITUDE", "LATITUDE"),
+                name="gwa_well_pre_2017_notnull",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="well",
+            index=models.Index(
+                condition=models.Q(("POST_2017__isnull", False)),
+                fields=["POST_2017"],
+                include=("LONGITUDE", "LATITUDE"),
+                name="gwa_well_post_2017_notnull",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="well",
+            index=models.Index(
+                condition=models.Q(("PRE_2018__isnull", False)),
+                fields=["PRE_2018"],
+                include=("LONGITUDE", "LATITUDE"),
+                name="gwa_well_pre_2018_notnull",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="well",
+            index=models.Index(
+                condition=models.Q(("POST_2018__isnull", False)),
+                fields=["POST_2018"],
+                include=("LONGITUDE", "LATITUDE"),
+                name="gwa_well_post_2018_notnull",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="well",
+            index=models.Index(
+                condition=models.Q(("PRE_2019__isnull", False)),
+                fields=["PRE_2019"],
+                include=("LONGITUDE", "LATITUDE"),
+                name="gwa_well_pre_2019_notnull",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="well",
+            index=models.Index(
+                condition=models.Q(("POST_2019__isnull", False)),
+                fields=["POST_2019"],
+                include=("LONGITUDE", "LATITUDE"),
+                name="gwa_well_post_2019_notnull",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="well",
+            index=models.Index(
+                condition=models.Q(("PRE_2020__isnull", False)),
+                fields=["PRE_2020"],
+                include=("LONGITUDE", "LATITUDE"),
+                name="gwa_well_pre_2020_notnull",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="well",
+            index=models.Index(
+                condition=models.Q(("POST_2020__isnull", False)),
+                fields=["POST_2020"],
+                include=("LONGITUDE", "LATITUDE"),
+                name="gwa_well_post_2020_notnull",
+            ),
+        ),
+    ]
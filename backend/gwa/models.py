@@ -38,6 +38,9 @@ class Village(models.Model):
         return f"{self.village_name} ({self.population_2011})"
 
 
+# Pre/post-monsoon water level columns, one pair per year
+WELL_SERIES_FIELDS = [f"{season}_{year}" for year in range(2011, 2021) for season in ("PRE", "POST")]
+
 
 class Well(models.Model):
     # Foreign Key relation to Village (village_code must match)
@@ -89,5 +92,18 @@ class Well(models.Model):
     PRE_2020 = models.FloatField(null=True, blank=True)
     POST_2020 = models.FloatField(null=True, blank=True)
 
+    class Meta:
+        # Interpolation reads LONGITUDE, LATITUDE, <field> WHERE <field> IS NOT NULL;
+        # partial covering indexes let Postgres answer that with an index-only scan
+        indexes = [
+            models.Index(
+                fields=[field],
+                include=['LONGITUDE', 'LATITUDE'],
+                condition=models.Q(**{f"{field}__isnull": False}),
+                name=f"gwa_well_{field.lower()}_notnull",
+            )
+            for field in WELL_SERIES_FIELDS
+        ]
+
     def __str__(self):
         return f"Well FID {self.FID_clip} in village {self.village_code_id}"
\ No newline at end of file
@@ -1,3 +1,26 @@
-from django.test import TestCase
+from gwa.models import State, District, Subdistrict, Village, Well, WELL_SERIES_FIELDS
+from main.testing import QueryPlanTestCase
 
-# Create your tests here.
+
+class WellQueryPlanTests(QueryPlanTestCase):
+    """EXPLAIN checks for the per-series Well filters indexed in 0004."""
+
+    @classmethod
+    def setUpTestData(cls):
+        state = State.objects.create(state_code=9, state_name="state")
+        district = District.objects.create(district_code=100, district_name="district", state_code=state)
+        subdistrict = Subdistrict.objects.create(subdistrict_code=1000, subdistrict_name="subdistrict", district_code=district)
+        village = Village.objects.create(village_code=1, village_name="village", population_2011=1, subdistrict_code=subdistrict)
+        Well.objects.bulk_create([
+            Well(
+                village_code=village, FID_clip=i, OBJECTID=i, LONGITUDE=80.0, LATITUDE=26.0,
+                **{field: (i if i % 7 == 0 else None) for field in WELL_SERIES_FIELDS},
+            )
+            for i in range(3000)
+        ], batch_size=1000)
+        cls.analyze(Well)
+
+    def test_well_series_not_null(self):
+        for field in WELL_SERIES_FIELDS:
+            with self.subTest(field=field):
+                self.assertNoSeqScan(Well.objects.filter(**{f"{field}__isnull": False}).values('LONGITUDE', 'LATITUDE', field))
@@ -0,0 +1,40 @@
+import json
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+@skipUnless(connection.vendor == 'postgresql', "EXPLAIN plans are only checked on Postgres")
+class QueryPlanTestCase(TestCase):
+    """
+    Base for tests that run EXPLAIN on hot ORM filters against a seeded database
+    and fail when a filtered table is read with a sequential scan. enable_seqscan
+    is switched off, so a Seq Scan in the plan means no usable index exists.
+    Run against Postgres through the POSTGRES_* settings, e.g.
+    POSTGRES_HOST=127.0.0.1 POSTGRES_PORT=5432 python manage.py test
+    """
+
+    @staticmethod
+    def analyze(*models):
+        with connection.cursor() as cursor:
+            for model in models:
+                cursor.execute(f'ANALYZE "{model._meta.db_table}"')
+
+    def assertNoSeqScan(self, queryset):
+        table = queryset.model._meta.db_table
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        scans = [node for node in plan_nodes(plan[0]['Plan']) if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') == table]
+        self.assertFalse(scans, f"Sequential scan on {table} for: {sql % tuple(params)}")
@@ -2,6 +2,7 @@
 from django.shortcuts import render
 from django.http import JsonResponse
 import geopandas as gpd
+from Basic.boundary_layers import load_layer, read_layer
 import os
 import uuid
 from django.conf import settings
@@ -119,8 +120,18 @@ def get_shapefile_data(request):
             
             logger.info(f"Reading shapefile from: {shapefile_path}")
 
-            # Read the shapefile
-            gdf = gpd.read_file(shapefile_path)
+            # Optional ?bbox=minx,miny,maxx,maxy (EPSG:4326) reads only the features in view
+            bbox = request.GET.get('bbox')
+            if bbox:
+                try:
+                    bbox = [float(value) for value in bbox.split(',')]
+                except ValueError:
+                    bbox = []
+                if len(bbox) != 4:
+                    return JsonResponse({'error': 'bbox must be minx,miny,maxx,maxy'}, status=400)
+
+            # Read the shapefile (cached per process, already converted to WGS84)
+            gdf = read_layer(shapefile_path, bbox=bbox) if bbox else load_layer(shapefile_path)
             
             # Add this to see coordinates in your console
             # print("Sample of coordinates:")
@@ -128,11 +139,6 @@ def get_shapefile_data(request):
             #  print(f"Feature {idx} coordinates:")
             # print(row.geometry)
             
-            # Convert to WGS84 if needed
-            if gdf.crs and gdf.crs != 'EPSG:4326':
-                logger.info("Converting CRS to EPSG:4326")
-             
-                gdf = gdf.to_crs('EPSG:4326')
 #               gdf_web = gdf.to_crs('EPSG:3857')
             features = []
             for idx, row in gdf.iterrows():
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-16 21:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rwm", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="waterquality_sampling_point_data",
+            index=models.Index(
+                fields=["Sub_District_Code"], name="sampling_sub_district_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="waterquality_sampling_point_data",
+            index=models.Index(fields=["District_Code"], name="sampling_district_idx"),
+        ),
+    ]
@@ -38,6 +38,10 @@ class WaterQuality_sampling_point_data(models.Model):
 
     class Meta:
         db_table = 'sampling_point_data'
+        indexes = [
+            models.Index(fields=['Sub_District_Code'], name='sampling_sub_district_idx'),
+            models.Index(fields=['District_Code'], name='sampling_district_idx'),
+        ]
 
 class WaterQuality_upstream(models.Model):
     s_no = models.FloatField(null=True, blank=True, db_column='S.No.')  # Matches 'S.No.'
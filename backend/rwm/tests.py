@@ -1,3 +1,24 @@
-from django.test import TestCase
+from main.testing import QueryPlanTestCase
+from rwm.models import WaterQuality_sampling_point_data
 
-# Create your tests here.
+
+class SamplingPointQueryPlanTests(QueryPlanTestCase):
+    """EXPLAIN checks for the sampling point code filters indexed in 0002."""
+
+    @classmethod
+    def setUpTestData(cls):
+        WaterQuality_sampling_point_data.objects.bulk_create([
+            WaterQuality_sampling_point_data(
+                Sub_District=f"sub {i}", Sub_District_Code=1000 + i % 200, District_Code=100 + i % 20,
+                sampling=f"S{i}", latitude=26.0, longitude=80.0, ph=7.0, temperature=25.0, ec=1.0,
+                tds=1.0, tss=1.0, do=1.0, turbidity=1.0, orp=1.0, cod=1.0, bod=1.0, chloride=1.0, hardness=1.0,
+            )
+            for i in range(3000)
+        ], batch_size=1000)
+        cls.analyze(WaterQuality_sampling_point_data)
+
+    def test_water_quality_sub_district(self):
+        self.assertNoSeqScan(WaterQuality_sampling_point_data.objects.filter(Sub_District_Code__in=[1001, 1002]))
+
+    def test_water_quality_district(self):
+        self.assertNoSeqScan(WaterQuality_sampling_point_data.objects.filter(District_Code__in=[101]))
@@ -12,6 +12,7 @@ from shapely.geometry import Point
 from .models import WaterQuality_sampling_point_data, WaterQuality_upstream, WaterQuality_downstream    
 import geopandas as gpd
 import os
+from Basic.boundary_layers import load_layer
 import json
 import logging
 
@@ -257,8 +258,8 @@ def shapefile_data(request,data_type='overall'):
             logger.error(f"Shapefile not found at: {shp_path}")
             return JsonResponse({'error': 'Shapefile not found'}, status=404)
         
-        # Read shapefile and convert to GeoJSON
-        gdf = gpd.read_file(shp_path)
+        # Read shapefile (cached per process, in EPSG:4326) and convert to GeoJSON
+        gdf = load_layer(shp_path)
         
         # Convert to GeoJSON string, then parse back to dict for JsonResponse
         geojson_str = gdf.to_json()
@@ -300,17 +301,13 @@ def shapefile_data_filtered(request,data_type='overall'):
         if not os.path.exists(shp_path):
             return JsonResponse({'error': 'Shapefile not found'}, status=404)
         
-        # Read shapefile
-        gdf = gpd.read_file(shp_path)
+        # Read shapefile (cached per process, already in WGS84 for web mapping)
+        gdf = load_layer(shp_path)
         
         # Optional: Filter or process the data
         # Example: Only include features with specific attributes
         # gdf = gdf[gdf['some_column'].notna()]
         
-        # Ensure the CRS is WGS84 for web mapping
-        if gdf.crs != 'EPSG:4326':
-            gdf = gdf.to_crs('EPSG:4326')
-        
         geojson_str = gdf.to_json()
         geojson_dict = json.loads(geojson_str)
         
@@ -336,8 +333,7 @@ def River(request):
             return Response({'error': f'River shapefile not found at: {shapefile_full_path}'}, status=404)
 
         # Read shapefile using GeoPandas
-        gdf = gpd.read_file(shapefile_full_path)
-        gdf = gdf.to_crs("EPSG:4326")
+        gdf = load_layer(shapefile_full_path)
         
         # Convert to GeoJSON
         geojson_data = json.loads(gdf.to_json())
@@ -363,8 +359,7 @@ def River_100m_buffer(request):
             return Response({'error': f'River buffer shapefile not found at: {shapefile_full_path}'}, status=404)
 
         # Read shapefile using GeoPandas
-        gdf = gpd.read_file(shapefile_full_path)
-        gdf = gdf.to_crs("EPSG:4326")
+        gdf = load_layer(shapefile_full_path)
         
         # Convert to GeoJSON
         geojson_data = json.loads(gdf.to_json())
@@ -394,17 +389,13 @@ def clipped_subdistrict(request):
         if not os.path.exists(shp_path):
             return JsonResponse({'error': 'Shapefile not found'}, status=404)
         
-        # Read shapefile
-        gdf = gpd.read_file(shp_path)
+        # Read shapefile (cached per process, already in WGS84 for web mapping)
+        gdf = load_layer(shp_path)
         
         # Optional: Filter or process the data
         # Example: Only include features with specific attributes
         # gdf = gdf[gdf['some_column'].notna()]
         
-        # Ensure the CRS is WGS84 for web mapping
-        if gdf.crs != 'EPSG:4326':
-            gdf = gdf.to_crs('EPSG:4326')
-        
         geojson_str = gdf.to_json()
         geojson_dict = json.loads(geojson_str)
         